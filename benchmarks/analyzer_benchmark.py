@@ -0,0 +1,239 @@
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from sales_data_analyzer import DataAnalyzer  # noqa: E402
+from synthetic_sales import COLUMNS, SIZES, write_sales_csv  # noqa: E402
+
+
+def measure(function, trace_memory) -> tuple:
+    """Runs a function while measuring either its wall time or the peak of the memory traced by tracemalloc
+       Both are not measured in the same run, since tracing slows down the many small allocations of pandas considerably
+
+    Args:
+        function (Callable): the function to run
+        trace_memory (bool): measures the peak memory in MB instead of the wall time in seconds
+
+    Returns:
+        tuple: contains the result of the function and the measurement
+    """
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    if not trace_memory:
+        return result, round(seconds, 6)
+
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, round(peak_memory/2**20, 3)
+
+
+def run_stages(conf, trace_memory) -> dict:
+    """Runs every stage of the analyzer once
+
+    Args:
+        conf (dict): contains the configuration options of the analyzer
+        trace_memory (bool): measures the peak memory of every stage instead of its wall time
+
+    Returns:
+        dict: contains the measurement of every stage
+    """
+
+    stages = {}
+    data_analyzer, stages["DataLoader.read_data"] = measure(
+        lambda: DataAnalyzer(conf, conf["input_file"]), trace_memory)
+    if data_analyzer.aggregator is None:
+        _, stages["DataAnalyzer.calculate_counts"] = measure(
+            data_analyzer.calculate_counts, trace_memory)
+    _, stages["DataAnalyzer.calculate_unoffered_products"] = measure(
+        data_analyzer.calculate_unoffered_products, trace_memory)
+    _, stages["DataAnalyzer.calculate_seller_effectiveness"] = measure(
+        lambda: data_analyzer.calculate_seller_effectiveness(conf), trace_memory)
+    _, stages["DataAnalyzer.calculate_seller_coverage"] = measure(
+        lambda: data_analyzer.calculate_seller_coverage(conf), trace_memory)
+    _, stages["DataAnalyzer.calculate_product_recommendations"] = measure(
+        data_analyzer.calculate_product_recommendations, trace_memory)
+    if conf["output_format"] != "none":
+        _, stages["DataAnalyzer.save_results"] = measure(
+            data_analyzer.save_results, trace_memory)
+    return stages
+
+
+def get_peak_rss_mb():
+    """Returns the peak resident set size of the process so far
+
+    Returns:
+        float | None: peak resident set size in MB, None where the resource module is not available
+    """
+
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak_rss/2**20 if sys.platform == "darwin" else peak_rss/2**10, 3)
+
+
+def get_revision():
+    """Returns the git revision of the analyzer being benchmarked
+
+    Returns:
+        str | None: the commit hash, None outside of a git checkout
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(name, knobs, args, temporary_path) -> dict:
+    """Benchmarks every stage of the analyzer on one size of generated sales
+
+    Args:
+        name (str): name of the size
+        knobs (dict): contains the rows, customers, sellers and products of the generated sales
+        args (argparse.Namespace): contains the benchmark options
+        temporary_path (str): folder for the generated input file and the results
+
+    Returns:
+        dict: contains the knobs and the measurements of every stage
+    """
+
+    input_file = os.path.join(temporary_path, f"{name}.csv")
+    write_sales_csv(input_file, accept_ratio=args.accept_ratio,
+                    seed=args.seed, **knobs)
+    if args.compression != "none":
+        compression = {"gz": gzip, "bz2": bz2}[args.compression]
+        with open(input_file, "rb") as f, compression.open(f"{input_file}.{args.compression}", "wb") as compressed:
+            shutil.copyfileobj(f, compressed)
+        os.remove(input_file)
+        input_file = f"{input_file}.{args.compression}"
+    conf = dict(COLUMNS, input_file=input_file, results_path=os.path.join(temporary_path, "results"),
+                output_format=args.output_format, output_workers=args.output_workers,
+                chunksize=args.chunksize, encode_columns=args.encode_columns,
+                recommendations_per_customer=args.recommendations, parse_workers=args.parse_workers)
+
+    seconds = run_stages(conf, trace_memory=False)
+    peak_memory = run_stages(conf, trace_memory=True)
+    stages = {stage: {"seconds": seconds[stage], "peak_memory_mb": peak_memory[stage]}
+              for stage in seconds}
+
+    return {"size": name, "knobs": dict(knobs, accept_ratio=args.accept_ratio, seed=args.seed),
+            "input_mb": round(os.path.getsize(input_file)/2**20, 3), "stages": stages,
+            "peak_rss_mb": get_peak_rss_mb()}
+
+
+def compare(results, baseline_file):
+    """Prints the ratio of every stage's time to the same stage of a previous benchmark
+
+    Args:
+        results (list): contains the measurements of this benchmark
+        baseline_file (str): JSON file written by a previous benchmark
+    """
+
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = {result["size"]: result for result in json.load(f)[
+            "results"]}
+
+    print(f"\nCompared with {baseline_file}:")
+    for result in results:
+        if result["size"] not in baseline or baseline[result["size"]]["knobs"] != result["knobs"]:
+            continue
+        for stage, measurement in result["stages"].items():
+            previous = baseline[result["size"]]["stages"].get(stage)
+            if previous and previous["seconds"]:
+                print(
+                    f"{result['size']:<8} {stage:<46} {measurement['seconds']/previous['seconds']:6.2f}x time")
+
+
+def main(argv=None):
+    """Benchmarks the analyzer on generated sales of several sizes
+
+    Args:
+        argv (list, optional): contains the command line arguments, those of the process by default. Defaults to None.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks every stage of sales_data_analyzer on seeded synthetic sales.")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["small", "medium"],
+                        help="presets of the generated sales (default: %(default)s)")
+    parser.add_argument("--rows", type=int, help="overrides the rows of every size")
+    parser.add_argument("--customers", type=int,
+                        help="overrides the customers of every size")
+    parser.add_argument("--sellers", type=int,
+                        help="overrides the sellers of every size")
+    parser.add_argument("--products", type=int,
+                        help="overrides the products of every size")
+    parser.add_argument("--accept-ratio", type=float, default=0.6,
+                        help="share of accepted sales (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the generated sales (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="chunksize of the analyzer (default: %(default)s)")
+    parser.add_argument("--encode-columns", action="store_true",
+                        help="encode the columns as categoricals while loading")
+    parser.add_argument("--compression", choices=["none", "gz", "bz2"], default="none",
+                        help="compression of the generated input file (default: %(default)s)")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse workers of a compressed input file, 0 uses one per CPU (default: %(default)s)")
+    parser.add_argument("--recommendations", type=int, default=5,
+                        help="ranked products per customer of the recommendations stage (default: %(default)s)")
+    parser.add_argument("--output-format", choices=DataAnalyzer.output_formats + ("none",), default="csv",
+                        help="output format of save_results, none skips it (default: %(default)s)")
+    parser.add_argument("--output-workers", type=int, default=1,
+                        help="output workers of save_results (default: %(default)s)")
+    parser.add_argument("--json", default="benchmark_results.json",
+                        help="file the results are written to (default: %(default)s)")
+    parser.add_argument("--compare",
+                        help="JSON file of a previous benchmark to compare the times with")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_path:
+        for name in args.sizes:
+            knobs = {key: getattr(args, key) or value for key,
+                     value in SIZES[name].items()}
+            result = run_size(name, knobs, args, temporary_path)
+            results.append(result)
+            for stage, measurement in result["stages"].items():
+                print(
+                    f"{name:<8} {stage:<46} {measurement['seconds']:10.3f} s {measurement['peak_memory_mb']:10.1f} MB")
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({"revision": get_revision(), "python": platform.python_version(), "pandas": pd.__version__,
+                   "options": {"chunksize": args.chunksize, "encode_columns": args.encode_columns, "recommendations": args.recommendations,
+                               "compression": args.compression, "parse_workers": args.parse_workers,
+                               "output_format": args.output_format, "output_workers": args.output_workers},
+                   "results": results}, f, indent=4)
+    print(f"Results written to {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
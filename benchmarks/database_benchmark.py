@@ -0,0 +1,118 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import pandas as pd
+from contextlib import closing
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from sales_data_analyzer import DataAnalyzer  # noqa: E402
+from analyzer_benchmark import get_revision, measure  # noqa: E402
+from synthetic_sales import COLUMNS, SIZES, generate_sales  # noqa: E402
+
+
+def count_sales(conf):
+    """Loads the sales and counts them into the count tables every report is produced from
+
+    Args:
+        conf (dict): contains the configuration options of the analyzer
+
+    Returns:
+        DataAnalyzer: contains the count tables
+    """
+
+    data_analyzer = DataAnalyzer(conf, conf["input_file"])
+    if data_analyzer.aggregator is None:
+        data_analyzer.calculate_counts()
+    return data_analyzer
+
+
+def run_size(name, knobs, args, temporary_path) -> dict:
+    """Benchmarks the count tables of one size of generated sales read from a .csv file and from a SQLite database
+
+    Args:
+        name (str): name of the size
+        knobs (dict): contains the rows, customers, sellers and products of the generated sales
+        args (argparse.Namespace): contains the benchmark options
+        temporary_path (str): folder for the generated input files
+
+    Returns:
+        dict: contains the knobs and the measurements of both sources
+    """
+
+    sales = generate_sales(accept_ratio=args.accept_ratio,
+                           seed=args.seed, **knobs)
+    input_file = os.path.join(temporary_path, f"{name}.csv")
+    database_file = os.path.join(temporary_path, f"{name}.db")
+    sales.to_csv(input_file, index=False)
+    with closing(sqlite3.connect(database_file)) as connection:
+        sales.astype(str).to_sql("sales", connection, index=False)
+    del sales
+
+    sources = {"csv": dict(COLUMNS, input_file=input_file, chunksize=args.chunksize),
+               "database": dict(COLUMNS, input_file=input_file, database_file=database_file, database_table="sales")}
+    measurements = {}
+    count_tables = {}
+    for source, conf in sources.items():
+        data_analyzer, seconds = measure(
+            lambda: count_sales(conf), trace_memory=False)
+        _, peak_memory = measure(lambda: count_sales(conf), trace_memory=True)
+        measurements[source] = {"seconds": seconds,
+                                "peak_memory_mb": peak_memory}
+        data_analyzer.calculate_seller_effectiveness(conf)
+        count_tables[source] = data_analyzer.seller_effectiveness
+
+    pd.testing.assert_frame_equal(
+        count_tables["csv"], count_tables["database"], check_dtype=False)
+
+    return {"size": name, "knobs": dict(knobs, accept_ratio=args.accept_ratio, seed=args.seed),
+            "input_mb": round(os.path.getsize(input_file)/2**20, 3),
+            "database_mb": round(os.path.getsize(database_file)/2**20, 3), "sources": measurements}
+
+
+def main(argv=None):
+    """Benchmarks the count tables read from a .csv file against those counted by SQLite on the same generated sales
+
+    Args:
+        argv (list, optional): contains the command line arguments, those of the process by default. Defaults to None.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks reading the sales from a .csv file against counting them in a SQLite database.")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["small", "medium"],
+                        help="presets of the generated sales (default: %(default)s)")
+    parser.add_argument("--accept-ratio", type=float, default=0.6,
+                        help="share of accepted sales (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the generated sales (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="chunksize of the .csv path (default: %(default)s)")
+    parser.add_argument("--json", default="database_benchmark_results.json",
+                        help="file the results are written to (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_path:
+        for name in args.sizes:
+            result = run_size(name, SIZES[name], args, temporary_path)
+            results.append(result)
+            for source, measurement in result["sources"].items():
+                print(
+                    f"{name:<8} {source:<10} {measurement['seconds']:10.3f} s {measurement['peak_memory_mb']:10.1f} MB")
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({"revision": get_revision(), "python": platform.python_version(), "pandas": pd.__version__,
+                   "sqlite": sqlite3.sqlite_version, "options": {"chunksize": args.chunksize}, "results": results}, f, indent=4)
+    print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "import sales_data_analyzer": [sys.executable, "-c", "import sales_data_analyzer"],
+    "sales_data_analyzer.py --help": [sys.executable, "sales_data_analyzer.py", "--help"],
+    "import pandas": [sys.executable, "-c", "import pandas"],
+    "import dataframe_image": [sys.executable, "-c", "import dataframe_image"]
+}
+
+
+def measure(command, repeat) -> dict:
+    """Measures the wall time of a command run in a fresh interpreter
+
+    Args:
+        command (list): contains the command and its arguments
+        repeat (int): number of runs
+
+    Returns:
+        dict: contains the median, minimum and maximum time in seconds, None if the command failed
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            command, cwd=ROOT_PATH, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            return None
+    return {"median": statistics.median(times), "min": min(times), "max": max(times)}
+
+
+def main(argv=None):
+    """Measures the cold start time of the analyzer and of its heavy dependencies
+
+    Args:
+        argv (list, optional): contains the command line arguments, those of the process by default. Defaults to None.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Measures the cold start time of sales_data_analyzer.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per command (default: %(default)s)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, command in COMMANDS.items():
+        results[name] = measure(command, args.repeat)
+        if results[name] is None:
+            print(f"{name:<32} failed")
+        else:
+            print(f"{name:<32} {results[name]['median']*1000:8.1f} ms (min {results[name]['min']*1000:.1f} ms, max {results[name]['max']*1000:.1f} ms)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "repeat": args.repeat,
+                      "results": results}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
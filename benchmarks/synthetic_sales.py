@@ -0,0 +1,83 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+COLUMNS = {
+    "customer_column_name": "kunde",
+    "seller_column_name": "verkäufer",
+    "product_column_name": "produkt",
+    "status_column_name": "status",
+    "status_accepted": "verkauft",
+    "status_rejected": "abgelehnt"
+}
+
+SIZES = {
+    "small": {"rows": 10_000, "customers": 200, "sellers": 20, "products": 50},
+    "medium": {"rows": 100_000, "customers": 2_000, "sellers": 100, "products": 200},
+    "large": {"rows": 1_000_000, "customers": 10_000, "sellers": 300, "products": 1_000}
+}
+
+
+def generate_sales(rows, customers, sellers, products, accept_ratio=0.6, seed=0) -> pd.DataFrame:
+    """Generates random sales with the columns of the default configuration
+
+    Args:
+        rows (int): number of sales
+        customers (int): number of distinct customers
+        sellers (int): number of distinct sellers
+        products (int): number of distinct products
+        accept_ratio (float, optional): share of the sales with the accepted status. Defaults to 0.6.
+        seed (int, optional): seed of the random generator, the same seed generates the same sales. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: contains the sales
+    """
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        COLUMNS["customer_column_name"]: pd.Categorical.from_codes(
+            rng.integers(0, customers, rows), [f"Customer {i:06d}" for i in range(customers)]),
+        COLUMNS["seller_column_name"]: pd.Categorical.from_codes(
+            rng.integers(0, sellers, rows), [f"Seller {i:05d}" for i in range(sellers)]),
+        COLUMNS["product_column_name"]: pd.Categorical.from_codes(
+            rng.integers(0, products, rows), [f"Product {i:05d}" for i in range(products)]),
+        COLUMNS["status_column_name"]: pd.Categorical.from_codes(
+            (rng.random(rows) >= accept_ratio).astype(np.int8), [COLUMNS["status_accepted"], COLUMNS["status_rejected"]])
+    })
+
+
+def write_sales_csv(path, rows, customers, sellers, products, accept_ratio=0.6, seed=0):
+    """Generates random sales and writes them into a .csv file
+
+    Args:
+        path (str): Filename of the .csv file
+        rows (int): number of sales
+        customers (int): number of distinct customers
+        sellers (int): number of distinct sellers
+        products (int): number of distinct products
+        accept_ratio (float, optional): share of the sales with the accepted status. Defaults to 0.6.
+        seed (int, optional): seed of the random generator. Defaults to 0.
+    """
+
+    generate_sales(rows, customers, sellers, products,
+                   accept_ratio, seed).to_csv(path, index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Writes random sales into a .csv file.")
+    parser.add_argument("path", help="the .csv file to write")
+    parser.add_argument("--size", choices=SIZES, default="small",
+                        help="preset for the knobs below (default: %(default)s)")
+    parser.add_argument("--rows", type=int)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--sellers", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--accept-ratio", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    knobs = {key: getattr(args, key) or value for key,
+             value in SIZES[args.size].items()}
+    write_sales_csv(args.path, accept_ratio=args.accept_ratio,
+                    seed=args.seed, **knobs)
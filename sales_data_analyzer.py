@@ -1,12 +1,30 @@
 import os
+import argparse
+import bz2
 import configparser
+import glob
+import gzip
+import hashlib
+import io
+import json
 import logging
-import tkinter as tk
-import dataframe_image as dfi
+import multiprocessing
+import queue
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
 import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from tkinter import filedialog
 from datetime import datetime
+from urllib.parse import unquote
 import warnings
 
 
@@ -40,6 +58,14 @@ class ConfigurationManager:
                     conf["results_path"] = config['Paths']['results_path']
                 if 'input_file' in config['Paths']:
                     conf["input_file"] = config['Paths']['input_file']
+                if 'cache_path' in config['Paths']:
+                    conf["cache_path"] = config['Paths']['cache_path']
+                if 'state_path' in config['Paths']:
+                    conf["state_path"] = config['Paths']['state_path']
+                if 'database_file' in config['Paths']:
+                    conf["database_file"] = config['Paths']['database_file']
+                if 'database_table' in config['Paths']:
+                    conf["database_table"] = config['Paths']['database_table']
 
             # Read and update column names
             if 'Column Names' in config:
@@ -53,6 +79,8 @@ class ConfigurationManager:
                     conf["seller_column_name"] = config['Column Names']['seller_column_name']
                 if 'status_column_name' in config['Column Names']:
                     conf["status_column_name"] = config['Column Names']['status_column_name']
+                if 'date_column_name' in config['Column Names']:
+                    conf["date_column_name"] = config['Column Names']['date_column_name']
 
                 # output file related settings
                 if 'seller_effectiveness_column' in config['Column Names']:
@@ -79,6 +107,70 @@ class ConfigurationManager:
                         'Output Filenames']['seller_effectiveness_filename']
                 if 'seller_coverage_filename' in config['Output Filenames']:
                     conf["seller_coverage_filename"] = config['Output Filenames']['seller_coverage_filename']
+                if 'product_recommendations_filename' in config['Output Filenames']:
+                    conf["product_recommendations_filename"] = config['Output Filenames']['product_recommendations_filename']
+                if 'seller_time_series_filename' in config['Output Filenames']:
+                    conf["seller_time_series_filename"] = config['Output Filenames']['seller_time_series_filename']
+                if 'output_format' in config['Output Filenames']:
+                    conf["output_format"] = config['Output Filenames']['output_format'].lower()
+
+            # Read and update processing related settings
+            if 'Processing' in config:
+                if 'chunksize' in config['Processing']:
+                    conf["chunksize"] = config['Processing'].getint(
+                        'chunksize')
+                if 'encode_columns' in config['Processing']:
+                    conf["encode_columns"] = config['Processing'].getboolean(
+                        'encode_columns')
+                if 'use_cache' in config['Processing']:
+                    conf["use_cache"] = config['Processing'].getboolean(
+                        'use_cache')
+                if 'cache_size_mb' in config['Processing']:
+                    conf["cache_size_mb"] = config['Processing'].getint(
+                        'cache_size_mb')
+                if 'incremental' in config['Processing']:
+                    conf["incremental"] = config['Processing'].getboolean(
+                        'incremental')
+                if 'dense_unoffered_limit' in config['Processing']:
+                    conf["dense_unoffered_limit"] = config['Processing'].getint(
+                        'dense_unoffered_limit')
+                if 'recommendations_per_customer' in config['Processing']:
+                    conf["recommendations_per_customer"] = config['Processing'].getint(
+                        'recommendations_per_customer')
+                if 'rolling_window_days' in config['Processing']:
+                    conf["rolling_window_days"] = [int(days) for days in config['Processing']['rolling_window_days'].split(",")
+                                                   if days.strip()]
+                if 'seller_time_series_per_customer' in config['Processing']:
+                    conf["seller_time_series_per_customer"] = config['Processing'].getboolean(
+                        'seller_time_series_per_customer')
+                if 'input_workers' in config['Processing']:
+                    conf["input_workers"] = config['Processing'].getint(
+                        'input_workers')
+                if 'parse_workers' in config['Processing']:
+                    conf["parse_workers"] = config['Processing'].getint(
+                        'parse_workers')
+                if 'output_workers' in config['Processing']:
+                    conf["output_workers"] = config['Processing'].getint(
+                        'output_workers')
+                if 'profile' in config['Processing']:
+                    conf["profile"] = config['Processing'].getboolean(
+                        'profile')
+                if 'profile_trace_memory' in config['Processing']:
+                    conf["profile_trace_memory"] = config['Processing'].getboolean(
+                        'profile_trace_memory')
+                if 'profile_cprofile' in config['Processing']:
+                    conf["profile_cprofile"] = config['Processing'].getboolean(
+                        'profile_cprofile')
+
+            # Read and update query service related settings
+            if 'Service' in config:
+                if 'host' in config['Service']:
+                    conf["service_host"] = config['Service']['host']
+                if 'port' in config['Service']:
+                    conf["service_port"] = config['Service'].getint('port')
+                if 'reload_interval' in config['Service']:
+                    conf["service_reload_interval"] = config['Service'].getfloat(
+                        'reload_interval')
 
         else:
             logging.warning(
@@ -86,10 +178,1490 @@ class ConfigurationManager:
         return conf
 
 
+class LabelDictionary:
+    """Responsible for assigning a stable int32 code to every label of a column
+       Labels are kept as strings, so that a label is the same whether a chunk or an input file read it as a number or as a string
+       They are decoded as numbers if all of them are numeric, as read_csv infers for a whole column
+    """
+
+    def __init__(self, labels=()):
+        """Constructor for a dictionary of labels
+
+        Args:
+            labels (Iterable, optional): Labels to start with, coded in their order. Defaults to ().
+        """
+        self.labels = pd.Index(labels, dtype=object).astype(str)
+        self.typed_labels = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def encode(self, values) -> np.ndarray:
+        """Converts values into codes of the dictionary, which is extended by any new labels
+
+        Args:
+            values (pd.Series): contains the labels, either as strings or as a categorical
+
+        Returns:
+            np.ndarray: contains the int32 codes of the labels, -1 for missing values
+        """
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values)
+        if labels.dtype.kind == "f" and np.all(np.mod(labels, 1) == 0):
+            # whole numbers read as floats because of missing values in the same column
+            labels = labels.astype(np.int64)
+        labels = labels.astype(str)
+
+        new_labels = labels[~labels.isin(self.labels)].unique()
+        if len(new_labels):
+            self.labels = pd.Index(np.concatenate(
+                [self.labels.to_numpy(), new_labels.to_numpy(dtype=object)]), dtype=object)
+            self.typed_labels = None
+
+        # the code -1 of a missing value picks the appended -1, also when a chunk has no labels at all
+        shared_codes = np.append(self.labels.get_indexer(labels), -1)
+        return shared_codes[codes].astype(np.int32)
+
+    def get_typed_labels(self) -> pd.Index:
+        """Returns the labels as numbers if all of them are numeric and stay distinct as numbers, otherwise as strings
+
+        Returns:
+            pd.Index: contains the labels in the order of their codes, object typed so that missing values can be decoded next to numbers
+        """
+
+        if self.typed_labels is None:
+            self.typed_labels = self.labels
+            try:
+                numbers = pd.to_numeric(self.labels)
+            except (ValueError, TypeError):
+                numbers = None
+            if numbers is not None and numbers.is_unique:
+                self.typed_labels = pd.Index(
+                    numbers.to_numpy(dtype=object), dtype=object)
+        return self.typed_labels
+
+    def decode(self, codes) -> pd.Index:
+        """Converts codes back into their labels
+
+        Args:
+            codes (Iterable): contains the codes, -1 is converted to a missing value
+
+        Returns:
+            pd.Index: contains the labels
+        """
+
+        return self.get_typed_labels().take(np.asarray(codes), allow_fill=True, fill_value=np.nan)
+
+
+class SalesAggregator:
+    """Responsible for keeping running count tables of the sales, from which every analysis can be produced
+       Sellers, customers and products are kept as int32 codes into shared label dictionaries, missing values are coded as -1
+    """
+
+    # code of a missing or invalid date in the days since 1970-01-01
+    missing_day = np.iinfo(np.int32).min
+    # smallest number of rows of pending partial count tables that are combined with a running count table
+    combine_rows = 2**20
+
+    def __init__(self, seller_column_name, customer_column_name, product_column_name, status_column_name, status_accepted, date_column_name=None):
+        """Constructor for empty count tables
+
+        Args:
+            seller_column_name (str): Name of the seller column
+            customer_column_name (str): Name of the customer column
+            product_column_name (str): Name of the product column
+            status_column_name (str): Name of the status column
+            status_accepted (str): Status of a successful sale
+            date_column_name (str, optional): Name of the date column, the counts are also kept per day if set. Defaults to None.
+        """
+        self.seller_column_name = seller_column_name
+        self.customer_column_name = customer_column_name
+        self.product_column_name = product_column_name
+        self.status_column_name = status_column_name
+        self.status_accepted = status_accepted
+        self.date_column_name = date_column_name
+
+        self.dictionaries = {
+            column: LabelDictionary() for column in [seller_column_name, customer_column_name, product_column_name]}
+        # offer_counts: accepted offers, total offers and rows per (seller, customer)
+        # product_counts: accepted offers and rows per (customer, product)
+        # daily_counts: accepted offers, total offers and rows per (day, seller, customer), days are counted since 1970-01-01
+        self.counts = {name: pd.DataFrame() for name in (
+            "offer_counts", "product_counts", "daily_counts")}
+        # partial count tables not yet combined with the running ones
+        self.partial_counts = {name: [] for name in self.counts}
+
+    @property
+    def offer_counts(self) -> pd.DataFrame:
+        return self.get_counts("offer_counts")
+
+    @offer_counts.setter
+    def offer_counts(self, counts):
+        self.set_counts("offer_counts", counts)
+
+    @property
+    def product_counts(self) -> pd.DataFrame:
+        return self.get_counts("product_counts")
+
+    @product_counts.setter
+    def product_counts(self, counts):
+        self.set_counts("product_counts", counts)
+
+    @property
+    def daily_counts(self) -> pd.DataFrame:
+        return self.get_counts("daily_counts")
+
+    @daily_counts.setter
+    def daily_counts(self, counts):
+        self.set_counts("daily_counts", counts)
+
+    def get_counts(self, name) -> pd.DataFrame:
+        """Returns a running count table, after combining it with its pending partial count tables
+
+        Args:
+            name (str): one of "offer_counts", "product_counts" and "daily_counts"
+
+        Returns:
+            pd.DataFrame: contains the counts
+        """
+
+        self.combine_counts(name)
+        return self.counts[name]
+
+    def set_counts(self, name, counts):
+        """Replaces a running count table and drops its pending partial count tables
+
+        Args:
+            name (str): one of "offer_counts", "product_counts" and "daily_counts"
+            counts (pd.DataFrame): contains the counts
+        """
+
+        self.counts[name] = counts
+        self.partial_counts[name] = []
+
+    def combine_counts(self, name):
+        """Adds the pending partial count tables to a running count table in a single grouping
+
+        Args:
+            name (str): one of "offer_counts", "product_counts" and "daily_counts"
+        """
+
+        partial_counts = self.partial_counts[name]
+        if not partial_counts:
+            return
+        if not self.counts[name].empty:
+            partial_counts = [self.counts[name]] + partial_counts
+        counts = partial_counts[0]
+        if len(partial_counts) > 1:
+            counts = pd.concat(partial_counts).groupby(
+                level=list(range(counts.index.nlevels))).sum()
+        self.set_counts(name, counts)
+
+    def encode(self, column, values) -> np.ndarray:
+        """Converts the values of a column into codes of its shared dictionary
+
+        Args:
+            column (str): Name of the column
+            values (pd.Series): contains the labels, either as strings or as a categorical
+
+        Returns:
+            np.ndarray: contains the int32 codes of the labels
+        """
+
+        return self.dictionaries[column].encode(values)
+
+    def decode(self, column, codes) -> pd.Index:
+        """Converts codes of a column back into its labels
+
+        Args:
+            column (str): Name of the column
+            codes (Iterable): contains the codes, -1 is converted to a missing value
+
+        Returns:
+            pd.Index: contains the labels
+        """
+
+        return self.dictionaries[column].decode(codes)
+
+    def update(self, data):
+        """Folds a chunk of sales into the running count tables
+
+        Args:
+            data (pd.DataFrame): contains the sales of the chunk
+        """
+
+        status = data[self.status_column_name]
+        offers = pd.DataFrame({
+            self.seller_column_name: self.encode(self.seller_column_name, data[self.seller_column_name]),
+            self.customer_column_name: self.encode(self.customer_column_name, data[self.customer_column_name]),
+            self.product_column_name: self.encode(self.product_column_name, data[self.product_column_name]),
+            "accepted": (status == self.status_accepted).to_numpy(),
+            "offers": status.notna().to_numpy(),
+            "rows": 1
+        })
+        offer_counts = offers.groupby(
+            [self.seller_column_name, self.customer_column_name])[["accepted", "offers", "rows"]].sum()
+        product_counts = offers.groupby(
+            [self.customer_column_name, self.product_column_name])[["accepted", "rows"]].sum()
+
+        daily_counts = None
+        if self.date_column_name is not None:
+            # sales without a valid date are only left out of the daily counts
+            days = self.get_days(data[self.date_column_name])
+            offers[self.date_column_name] = days
+            daily_counts = offers[days != self.missing_day].groupby(
+                [self.date_column_name, self.seller_column_name, self.customer_column_name])[["accepted", "offers", "rows"]].sum()
+
+        self.merge_counts(offer_counts, product_counts, daily_counts)
+
+    def get_days(self, values) -> np.ndarray:
+        """Converts dates into the number of days since 1970-01-01
+
+        Args:
+            values (pd.Series): contains the dates, either as strings, as datetimes or as a categorical
+
+        Returns:
+            np.ndarray: contains the int32 days, missing and invalid dates are coded as missing_day
+        """
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # every distinct date is only parsed once
+            days = np.append(self.get_days(
+                pd.Series(values.cat.categories)), self.missing_day)
+            return days[values.cat.codes.to_numpy()]
+
+        dates = pd.to_datetime(values, errors="coerce")
+        days = dates.to_numpy(dtype="datetime64[ns]").astype(
+            "datetime64[D]").astype(np.int64)
+        return np.where(dates.notna().to_numpy(), days, self.missing_day).astype(np.int32)
+
+    def merge_counts(self, offer_counts, product_counts, daily_counts=None):
+        """Adds already grouped count tables, coded with the same dictionaries, to the running count tables
+
+        Args:
+            offer_counts (pd.DataFrame): accepted offers, total offers and rows per (seller, customer)
+            product_counts (pd.DataFrame): accepted offers and rows per (customer, product)
+            daily_counts (pd.DataFrame, optional): accepted offers, total offers and rows per (day, seller, customer). Defaults to None.
+        """
+
+        for name, counts in [("offer_counts", offer_counts), ("product_counts", product_counts), ("daily_counts", daily_counts)]:
+            if counts is None:
+                continue
+            partial_counts = self.partial_counts[name]
+            partial_counts.append(counts)
+            # regrouping the running table only once the pending tables are about as large keeps the total cost linear in the number of chunks
+            if sum(map(len, partial_counts)) >= max(len(self.counts[name]), self.combine_rows):
+                self.combine_counts(name)
+
+    def get_state(self):
+        """Returns the count tables as arrays and the label dictionaries as lists, so that they can be persisted
+
+        Returns:
+            tuple[dict, dict]: contains the arrays of the count tables and the labels of every dictionary
+        """
+
+        arrays = {}
+        tables = [("offer_counts", self.offer_counts.reset_index()),
+                  ("product_counts", self.product_counts.reset_index())]
+        if not self.daily_counts.empty:
+            tables.append(("daily_counts", self.daily_counts.reset_index()))
+        for name, counts in tables:
+            for i, column in enumerate(counts.columns):
+                arrays[f"{name}_{i}"] = counts[column].to_numpy(
+                    dtype=np.int64)
+        labels = {column: dictionary.labels.tolist()
+                  for column, dictionary in self.dictionaries.items()}
+        return arrays, labels
+
+    def set_state(self, arrays, labels):
+        """Replaces the count tables and label dictionaries by persisted ones
+
+        Args:
+            arrays (dict): contains the arrays of the count tables as returned by get_state
+            labels (dict): contains the labels of every dictionary as returned by get_state
+        """
+
+        for column, column_labels in labels.items():
+            self.dictionaries[column] = LabelDictionary(column_labels)
+
+        offer_index = pd.MultiIndex.from_arrays([arrays["offer_counts_0"].astype(np.int32), arrays["offer_counts_1"].astype(np.int32)],
+                                                names=[self.seller_column_name, self.customer_column_name])
+        self.offer_counts = pd.DataFrame({"accepted": arrays["offer_counts_2"], "offers": arrays["offer_counts_3"],
+                                          "rows": arrays["offer_counts_4"]}, index=offer_index)
+        product_index = pd.MultiIndex.from_arrays([arrays["product_counts_0"].astype(np.int32), arrays["product_counts_1"].astype(np.int32)],
+                                                  names=[self.customer_column_name, self.product_column_name])
+        self.product_counts = pd.DataFrame({"accepted": arrays["product_counts_2"], "rows": arrays["product_counts_3"]},
+                                           index=product_index)
+        if "daily_counts_0" in arrays:
+            daily_index = pd.MultiIndex.from_arrays([arrays[f"daily_counts_{i}"].astype(np.int32) for i in range(3)],
+                                                    names=[self.date_column_name, self.seller_column_name, self.customer_column_name])
+            self.daily_counts = pd.DataFrame({"accepted": arrays["daily_counts_3"], "offers": arrays["daily_counts_4"],
+                                              "rows": arrays["daily_counts_5"]}, index=daily_index)
+
+    def merge(self, *others):
+        """Adds the count tables of other aggregators, e.g. of other input files, whose codes refer to their own dictionaries
+           The count tables of all aggregators are combined in a single grouping
+
+        Args:
+            *others (SalesAggregator): contain the count tables to be added
+        """
+
+        def remap(index, mappings):
+            levels = []
+            for name in index.names:
+                codes = index.get_level_values(name).to_numpy()
+                if name not in mappings:
+                    # days are not coded with a dictionary
+                    levels.append(codes)
+                    continue
+                # the code -1 of a missing value picks the appended -1
+                levels.append(
+                    np.append(mappings[name], -1)[codes].astype(np.int32))
+            return pd.MultiIndex.from_arrays(levels, names=index.names)
+
+        for other in others:
+            mappings = {column: dictionary.encode(pd.Series(other.dictionaries[column].labels, dtype=object))
+                        for column, dictionary in self.dictionaries.items()}
+            for name in self.counts:
+                counts = other.get_counts(name)
+                if not counts.empty:
+                    self.partial_counts[name].append(
+                        counts.set_axis(remap(counts.index, mappings), axis=0))
+        for name in self.counts:
+            self.combine_counts(name)
+
+    def get_customers(self) -> list:
+        """Returns the sorted customers seen so far
+
+        Returns:
+            list: contains the names of the customers
+        """
+
+        codes = self.product_counts.index.get_level_values(
+            self.customer_column_name).unique()
+        customers = list(self.decode(
+            self.customer_column_name, codes[codes >= 0]))
+        customers.sort(reverse=False)
+        return customers
+
+
+class ProductOfferMatrix:
+    """Responsible for the sparse customer x product matrix of offered products, from which the unoffered products are derived
+       The offered pairs are kept in compressed sparse rows (CSR), customers and products are numbered in the order of their labels
+    """
+
+    def __init__(self, aggregator):
+        """Constructor for the matrix of the offered pairs counted by an aggregator
+
+        Args:
+            aggregator (SalesAggregator): contains the counted (customer, product) pairs
+        """
+        self.customer_column_name = aggregator.customer_column_name
+        self.product_column_name = aggregator.product_column_name
+
+        offered_pairs = aggregator.product_counts.index
+        customer_codes = offered_pairs.get_level_values(
+            self.customer_column_name).to_numpy()
+        product_codes = offered_pairs.get_level_values(
+            self.product_column_name).to_numpy()
+
+        # number the customers and products that occur in the order of their labels
+        self.customer_positions, self.customers = self.get_positions(
+            aggregator, self.customer_column_name, customer_codes)
+        self.product_positions, self.products = self.get_positions(
+            aggregator, self.product_column_name, product_codes)
+
+        known_pairs = (customer_codes >= 0) & (product_codes >= 0)
+        rows = self.customer_positions[customer_codes[known_pairs]]
+        columns = self.product_positions[product_codes[known_pairs]]
+        order = np.lexsort((columns, rows))
+        self.indices = columns[order]
+        self.indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(rows, minlength=len(self.customers)))))
+        self.column_indptr = None
+        self.column_rows = None
+
+    @staticmethod
+    def get_positions(aggregator, column, codes):
+        """Numbers the labels of the codes that occur in the order of the labels
+
+        Args:
+            aggregator (SalesAggregator): contains the dictionary of the column
+            column (str): Name of the column
+            codes (np.ndarray): contains the codes that occur, -1 for missing values
+
+        Returns:
+            tuple: contains an array mapping every code to its position, and the sorted labels
+        """
+
+        occurring_codes = np.unique(codes[codes >= 0])
+        labels, order = aggregator.decode(
+            column, occurring_codes).sort_values(return_indexer=True)
+        positions = np.full(len(aggregator.dictionaries[column]), -1)
+        positions[occurring_codes[order]] = np.arange(len(occurring_codes))
+        return positions, labels.rename(column)
+
+    def get_shape(self) -> tuple:
+        """Returns the number of customers and products
+
+        Returns:
+            tuple: contains the number of customers and the number of products
+        """
+
+        return len(self.customers), len(self.products)
+
+    def count_unoffered(self) -> int:
+        """Counts the unoffered (customer, product) pairs
+
+        Returns:
+            int: the number of unoffered pairs
+        """
+
+        return len(self.customers)*len(self.products) - len(self.indices)
+
+    def get_unoffered_products(self, customer) -> list:
+        """Returns the products which have not been offered to a customer yet
+
+        Args:
+            customer (str): Name of the customer
+
+        Raises:
+            KeyError: functions fails if the customer is unknown
+
+        Returns:
+            list: contains the sorted names of the unoffered products
+        """
+
+        row = self.customers.get_loc(customer)
+        return list(self.products[self.get_unoffered_mask(row, row+1)[0]])
+
+    def get_unoffered_customers(self, product) -> list:
+        """Returns the customers to whom a product has not been offered yet
+           The offered pairs are sorted by product on the first call, so that every further call only reads the customers of one product
+
+        Args:
+            product (str): Name of the product
+
+        Raises:
+            KeyError: functions fails if the product is unknown
+
+        Returns:
+            list: contains the sorted names of the customers
+        """
+
+        column = self.products.get_loc(product)
+        if self.column_indptr is None:
+            rows = np.repeat(np.arange(len(self.customers)),
+                             np.diff(self.indptr))
+            self.column_rows = rows[np.argsort(self.indices, kind="stable")]
+            self.column_indptr = np.concatenate(
+                ([0], np.cumsum(np.bincount(self.indices, minlength=len(self.products)))))
+
+        unoffered = np.ones(len(self.customers), dtype=bool)
+        unoffered[self.column_rows[self.column_indptr[column]
+            :self.column_indptr[column+1]]] = False
+        return list(self.customers[unoffered])
+
+    def get_unoffered_mask(self, start, stop) -> np.ndarray:
+        """Returns a dense mask of the unoffered products of a range of customers
+
+        Args:
+            start (int): position of the first customer
+            stop (int): position after the last customer
+
+        Returns:
+            np.ndarray: a boolean customers x products array, True where the product has not been offered
+        """
+
+        mask = np.ones((stop-start, len(self.products)), dtype=bool)
+        rows = np.repeat(np.arange(stop-start),
+                         np.diff(self.indptr[start:stop+1]))
+        mask[rows, self.indices[self.indptr[start]:self.indptr[stop]]] = False
+        return mask
+
+    def iter_unoffered_pairs(self, batch_cells=10_000_000):
+        """Yields the unoffered (customer, product) pairs in long format, sorted by customer and product
+
+        Args:
+            batch_cells (int, optional): maximal number of matrix cells expanded at once. Defaults to 10_000_000.
+
+        Yields:
+            pd.DataFrame: contains the unoffered pairs of a batch of customers
+        """
+
+        batch_size = max(batch_cells // max(len(self.products), 1), 1)
+        for start in range(0, len(self.customers), batch_size):
+            stop = min(start+batch_size, len(self.customers))
+            rows, columns = np.nonzero(self.get_unoffered_mask(start, stop))
+            yield pd.DataFrame({self.customer_column_name: self.customers[start:stop].take(rows),
+                                self.product_column_name: self.products.take(columns)})
+
+    def export_unoffered_pairs(self, path) -> int:
+        """Writes the unoffered (customer, product) pairs in long format into a .csv file without building the dense matrix
+
+        Args:
+            path (str): Filename of the .csv file
+
+        Returns:
+            int: the number of written pairs
+        """
+
+        pairs = 0
+        with open(path, "w", encoding='utf-8', newline="") as f:
+            for batch in self.iter_unoffered_pairs():
+                batch.to_csv(f, index=False, header=pairs == 0)
+                pairs += len(batch)
+            if pairs == 0:
+                f.write(
+                    f"{self.customer_column_name},{self.product_column_name}\n")
+        return pairs
+
+    def to_dense(self) -> pd.DataFrame:
+        """Builds the dense customer x product table of the unoffered products, marked with "X"
+           Customers that have been offered every product and products offered to every customer are left out
+
+        Returns:
+            pd.DataFrame: contains the unoffered products per customer
+        """
+
+        mask = self.get_unoffered_mask(0, len(self.customers))
+        customer_rows = mask.any(axis=1)
+        product_columns = mask.any(axis=0)
+        return pd.DataFrame(np.where(mask[np.ix_(customer_rows, product_columns)], "X", ""),
+                            index=self.customers[customer_rows], columns=self.products[product_columns], dtype=object)
+
+
+class ProductRecommender:
+    """Responsible for ranking the unoffered products of every customer by how often they have been accepted together with the products the customer has accepted
+       The product x product co-occurrence matrix and the scores are sparse matrix products of the customer x product matrix of accepted offers, computed with numpy on the positions of an offer matrix
+    """
+
+    # largest co-occurrence matrix multiplied as a dense array, where BLAS is faster than expanding the sparse rows
+    dense_cooccurrence_limit = 10_000_000
+
+    def __init__(self, aggregator, unoffered_matrix, batch_pairs=2_000_000):
+        """Constructor for the co-occurrence matrix of the accepted products
+
+        Args:
+            aggregator (SalesAggregator): contains the accepted offers per (customer, product)
+            unoffered_matrix (ProductOfferMatrix): contains the offered products of the same aggregator
+            batch_pairs (int, optional): maximal number of product pairs or matrix cells expanded at once. Defaults to 2_000_000.
+        """
+        self.unoffered_matrix = unoffered_matrix
+        self.batch_pairs = batch_pairs
+
+        product_counts = aggregator.product_counts
+        customer_codes = product_counts.index.get_level_values(
+            aggregator.customer_column_name).to_numpy()
+        product_codes = product_counts.index.get_level_values(
+            aggregator.product_column_name).to_numpy()
+        accepted = (product_counts["accepted"].to_numpy() > 0) & (
+            customer_codes >= 0) & (product_codes >= 0)
+
+        # the baskets, i.e. the accepted products of every customer, as compressed sparse rows
+        rows = unoffered_matrix.customer_positions[customer_codes[accepted]]
+        columns = unoffered_matrix.product_positions[product_codes[accepted]]
+        order = np.lexsort((columns, rows))
+        self.basket_indices = columns[order]
+        self.basket_indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(rows, minlength=len(unoffered_matrix.customers)))))
+
+        self.count_cooccurrences()
+
+    @staticmethod
+    def get_range_positions(starts, lengths) -> np.ndarray:
+        """Concatenates the ranges start, start+1, ..., start+length-1 of several starts and lengths without a Python loop
+
+        Args:
+            starts (np.ndarray): contains the first position of every range
+            lengths (np.ndarray): contains the length of every range
+
+        Returns:
+            np.ndarray: contains the positions of all ranges one after another
+        """
+
+        ends = np.cumsum(lengths)
+        return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+    def get_batches(self, weights) -> list:
+        """Splits the customers into consecutive batches whose weights add up to about batch_pairs
+
+        Args:
+            weights (np.ndarray): contains the weight of every customer
+
+        Returns:
+            list: contains the (start, stop) positions of every batch
+        """
+
+        batch_ids = np.cumsum(weights) // self.batch_pairs
+        stops = np.flatnonzero(np.diff(batch_ids)) + 1
+        boundaries = np.concatenate(([0], stops, [len(weights)]))
+        return [(start, stop) for start, stop in zip(boundaries[:-1], boundaries[1:]) if stop > start]
+
+    def count_cooccurrences(self):
+        """Counts for every two different products the customers who have accepted both, i.e. the off-diagonal of the basket matrix multiplied by its transpose
+        """
+
+        products = len(self.unoffered_matrix.products)
+        basket_sizes = np.diff(self.basket_indptr)
+        # small matrices are counted in place, larger ones as the sorted keys and counts of every batch
+        dense = products**2 <= self.dense_cooccurrence_limit
+        totals = np.zeros(products**2 if dense else 0, dtype=np.int64)
+        keys, counts = [], []
+        for start, stop in self.get_batches(basket_sizes.astype(np.int64)**2):
+            # pair every accepted product of a customer with every other accepted product of the same customer
+            sizes = basket_sizes[start:stop]
+            entry_sizes = np.repeat(sizes, sizes)
+            left = np.repeat(
+                self.basket_indices[self.basket_indptr[start]:self.basket_indptr[stop]], entry_sizes)
+            right = self.basket_indices[self.get_range_positions(
+                np.repeat(self.basket_indptr[start:stop], sizes), entry_sizes)]
+            different = left != right
+            batch_keys = left[different].astype(
+                np.int64)*products + right[different]
+            if dense:
+                totals += np.bincount(batch_keys, minlength=products**2)
+            else:
+                batch_keys, batch_counts = np.unique(
+                    batch_keys, return_counts=True)
+                keys.append(batch_keys)
+                counts.append(batch_counts)
+
+        if dense:
+            keys = np.flatnonzero(totals)
+            self.cooccurrence_counts = totals[keys]
+        else:
+            keys = np.concatenate(keys) if keys else np.array(
+                [], dtype=np.int64)
+            counts = np.concatenate(counts) if counts else np.array(
+                [], dtype=np.int64)
+            keys, inverse = np.unique(keys, return_inverse=True)
+            self.cooccurrence_counts = np.bincount(
+                inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+        self.cooccurrence_indices = keys % max(products, 1)
+        self.cooccurrence_indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(keys // max(products, 1), minlength=products))))
+
+    def rank(self, top_n=5) -> pd.DataFrame:
+        """Ranks the unoffered products of every customer by the sum of their co-occurrences with the customer's accepted products
+           Products without any co-occurrence are not ranked, ties are broken by the name of the product
+
+        Args:
+            top_n (int, optional): number of ranked products per customer. Defaults to 5.
+
+        Returns:
+            pd.DataFrame: contains the customer, the rank, the product and the score of every ranked product
+        """
+
+        customers, products = self.unoffered_matrix.get_shape()
+        top_n = min(top_n, products)
+        columns = {self.unoffered_matrix.customer_column_name: [], "Rank": [],
+                   self.unoffered_matrix.product_column_name: [], "Score": []}
+        if top_n <= 0:
+            return pd.DataFrame(columns)
+
+        basket_sizes = np.diff(self.basket_indptr)
+        row_lengths = np.diff(self.cooccurrence_indptr)
+        cooccurrences = None
+        if products**2 <= self.dense_cooccurrence_limit:
+            cooccurrences = np.zeros((products, products))
+            cooccurrences[np.repeat(np.arange(products), row_lengths),
+                          self.cooccurrence_indices] = self.cooccurrence_counts
+            weights = np.full(customers, products, dtype=np.int64)
+        else:
+            # the sparse rows of the co-occurrence matrix expanded for every customer
+            weights = products + np.bincount(np.repeat(np.arange(customers), basket_sizes),
+                                             weights=row_lengths[self.basket_indices], minlength=customers).astype(np.int64)
+
+        for start, stop in self.get_batches(weights):
+            rows = np.repeat(np.arange(stop-start), basket_sizes[start:stop])
+            accepted = self.basket_indices[self.basket_indptr[start]:self.basket_indptr[stop]]
+            if cooccurrences is not None:
+                baskets = np.zeros((stop-start, products))
+                baskets[rows, accepted] = 1
+                scores = baskets @ cooccurrences
+            else:
+                # add up the sparse co-occurrence rows of every accepted product of the batch
+                lengths = row_lengths[accepted]
+                positions = self.get_range_positions(
+                    self.cooccurrence_indptr[accepted], lengths)
+                scores = np.bincount(np.repeat(rows, lengths)*products + self.cooccurrence_indices[positions],
+                                     weights=self.cooccurrence_counts[positions], minlength=(stop-start)*products)
+            scores = scores.reshape(stop-start, products).astype(np.int64)
+            scores[~self.unoffered_matrix.get_unoffered_mask(start, stop)] = 0
+
+            # a unique key per product keeps the order of equal scores by product name, also in argpartition
+            keys = scores*products + (products - 1 - np.arange(products))
+            top = np.argpartition(-keys, top_n-1, axis=1)[:, :top_n]
+            top = np.take_along_axis(top, np.argsort(
+                -np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            ranked_rows, ranks = np.nonzero(top_scores > 0)
+
+            columns[self.unoffered_matrix.customer_column_name].append(
+                self.unoffered_matrix.customers[start:stop].take(ranked_rows))
+            columns["Rank"].append(ranks + 1)
+            columns[self.unoffered_matrix.product_column_name].append(
+                self.unoffered_matrix.products.take(top[ranked_rows, ranks]))
+            columns["Score"].append(top_scores[ranked_rows, ranks])
+
+        return pd.DataFrame({column: np.concatenate(values) if values else [] for column, values in columns.items()})
+
+
+class SellerTimeSeries:
+    """Responsible for the effectiveness and coverage of every seller, or of every seller per customer, over weekly and rolling windows of days
+       The daily counts are summed up once along the days, so that the counts of any window are the difference of two cumulative sums
+    """
+
+    def __init__(self, aggregator, per_customer=False):
+        """Constructor for the cumulative daily counts of an aggregator's sellers or (seller, customer) pairs
+
+        Args:
+            aggregator (SalesAggregator): contains the counts per (day, seller, customer)
+            per_customer (bool, optional): sums up the counts per (seller, customer) pair instead of per seller. Defaults to False.
+        """
+        self.seller_column_name = aggregator.seller_column_name
+        self.customer_column_name = aggregator.customer_column_name
+
+        daily_counts = aggregator.daily_counts
+        if daily_counts.empty:
+            days = seller_codes = customer_codes = accepted = offers = np.array(
+                [], dtype=np.int64)
+        else:
+            days = daily_counts.index.get_level_values(0).to_numpy()
+            seller_codes = daily_counts.index.get_level_values(1).to_numpy()
+            customer_codes = daily_counts.index.get_level_values(2).to_numpy()
+            accepted = daily_counts["accepted"].to_numpy()
+            offers = daily_counts["offers"].to_numpy()
+        self.first_day = int(days.min()) if len(days) else 0
+        self.last_day = int(days.max()) if len(days) else -1
+        seller_positions, sellers = ProductOfferMatrix.get_positions(
+            aggregator, self.seller_column_name, seller_codes)
+
+        # the counts are summed up per column, a seller or a (seller, customer) pair, and the offers of all sellers per group, all offers or those to a customer
+        known = seller_codes >= 0
+        if per_customer:
+            customer_positions, customers = ProductOfferMatrix.get_positions(
+                aggregator, self.customer_column_name, customer_codes)
+            # code -1 of a missing customer takes the appended -1
+            groups = np.append(customer_positions, -1)[customer_codes]
+            known &= groups >= 0
+            pairs, columns = np.unique(
+                seller_positions[seller_codes[known]]*len(customers) + groups[known], return_inverse=True)
+            self.sellers = sellers.take(pairs // len(customers))
+            self.customers = customers.take(pairs % len(customers))
+            self.groups = pairs % len(customers)
+            group_count = len(customers)
+        else:
+            groups = np.zeros(len(days), dtype=np.int64)
+            columns = seller_positions[seller_codes[known]]
+            self.sellers = sellers
+            self.customers = None
+            self.groups = np.zeros(len(sellers), dtype=np.int64)
+            group_count = 1
+
+        # accepted and total offers per (day, column) and all offers per (day, group), summed up along the days after a row of zeros
+        day_count, column_count = self.last_day - \
+            self.first_day + 1, len(self.sellers)
+        rows = days.astype(np.int64) - self.first_day
+        self.accepted, self.offers = [self.sum_up(rows[known]*column_count + columns, counts[known], day_count, column_count)
+                                      for counts in (accepted, offers)]
+        grouped = groups >= 0
+        self.total_offers = self.sum_up(
+            rows[grouped]*group_count + groups[grouped], offers[grouped], day_count, group_count)
+
+    @staticmethod
+    def sum_up(cells, counts, day_count, column_count) -> np.ndarray:
+        """Sums up counts per (day, column) cell along the days
+
+        Args:
+            cells (np.ndarray): contains the cell day*column_count + column of every count
+            counts (np.ndarray): contains the counts
+            day_count (int): number of days
+            column_count (int): number of columns
+
+        Returns:
+            np.ndarray: contains the sums of the days before every day and after the last day per column
+        """
+
+        daily = np.bincount(cells, weights=counts, minlength=day_count *
+                            column_count).astype(np.int64).reshape(day_count, column_count)
+        return np.concatenate((np.zeros((1, column_count), dtype=np.int64), np.cumsum(daily, axis=0)))
+
+    def get_window_counts(self, starts, stops) -> tuple:
+        """Returns the counts of every seller or (seller, customer) pair in windows of days
+
+        Args:
+            starts (np.ndarray): contains the first day of every window, counted since 1970-01-01
+            stops (np.ndarray): contains the day after the last day of every window
+
+        Returns:
+            tuple: contains the accepted and total offers per window and column and all offers per window and group
+        """
+
+        starts = np.clip(starts - self.first_day, 0, len(self.total_offers)-1)
+        stops = np.clip(stops - self.first_day, 0, len(self.total_offers)-1)
+        return self.accepted[stops] - self.accepted[starts], self.offers[stops] - self.offers[starts], \
+            self.total_offers[stops] - self.total_offers[starts]
+
+    def get_windows(self, days=None) -> tuple:
+        """Returns the windows from the first to the last day with sales
+
+        Args:
+            days (int, optional): length of the rolling windows ending on every day, calendar weeks from Monday to Sunday if None. Defaults to None.
+
+        Returns:
+            tuple: contains the first day and the day after the last day of every window
+        """
+
+        if days is None:
+            # 1970-01-01 was a Thursday
+            first_monday = self.first_day - (self.first_day + 3) % 7
+            starts = np.arange(first_monday, self.last_day+1, 7)
+            return starts, starts + 7
+        stops = np.arange(self.first_day+1, self.last_day+2)
+        return stops - days, stops
+
+    def to_frame(self, rolling_window_days, effectiveness_column, coverage_column) -> pd.DataFrame:
+        """Calculates the effectiveness and coverage of every seller, or of every seller per customer, per calendar week and over rolling windows ending on every day
+           The coverage of a seller per customer is the share of the offers to the customer in the window
+
+        Args:
+            rolling_window_days (list): contains the lengths of the rolling windows in days
+            effectiveness_column (str): Name of the effectiveness column
+            coverage_column (str): Name of the coverage column
+
+        Returns:
+            pd.DataFrame: contains one row per window and seller, or (seller, customer) pair, with offers in the window
+        """
+
+        frames = []
+        for days in [None] + list(rolling_window_days):
+            starts, stops = self.get_windows(days)
+            accepted, offers, total_offers = self.get_window_counts(
+                starts, stops)
+            windows, columns = np.nonzero(offers > 0)
+            frame = {
+                "Window": "Week" if days is None else f"{days} days",
+                "Start": (starts[windows]).astype("datetime64[D]"),
+                "End": (stops[windows] - 1).astype("datetime64[D]"),
+                self.seller_column_name: self.sellers.take(columns)
+            }
+            if self.customers is not None:
+                frame[self.customer_column_name] = self.customers.take(columns)
+            frames.append(pd.DataFrame(dict(frame, **{
+                "Accepted": accepted[windows, columns],
+                "Offers": offers[windows, columns],
+                effectiveness_column: np.round(accepted[windows, columns]/offers[windows, columns]*100, 2),
+                coverage_column: np.round(offers[windows, columns]/total_offers[windows, self.groups[columns]]*100, 2)
+            })))
+        return pd.concat(frames, ignore_index=True)
+
+
+class DataCache:
+    """Responsible for keeping a parsed input file as memory-mappable column arrays, so that an unchanged input file is not parsed again
+       Entries are keyed on the path, size, modification time and content hash of the input file, so any change to it invalidates its entry
+    """
+
+    version = 1
+    metadata_filename = "metadata.json"
+    # seconds after which an entry without metadata, e.g. one left behind by a crashed writer, is considered abandoned
+    abandoned_seconds = 3600
+
+    def __init__(self, input_file, cache_path="cache", cache_size_mb=1024):
+        """Constructor for the cache entry of an input file
+
+        Args:
+            input_file (str): Filename of the input .csv file
+            cache_path (str, optional): Path where the cache entries are saved at. Defaults to "cache".
+            cache_size_mb (int, optional): Size in MB above which the least recently used entries are removed. Defaults to 1024.
+        """
+        self.input_file = input_file
+        self.cache_path = cache_path
+        self.cache_size = cache_size_mb * 2**20
+
+        self.file_key = self.get_file_key()
+        entry = hashlib.blake2b(json.dumps(
+            self.file_key, sort_keys=True).encode(), digest_size=16).hexdigest()
+        self.entry_path = os.path.join(self.cache_path, entry)
+
+        self.metadata = self.read_metadata(self.entry_path)
+        if self.metadata is not None and (self.metadata["version"] != self.version or self.metadata["file_key"] != self.file_key):
+            self.metadata = None
+        self.labels = {}
+
+    def get_file_key(self) -> dict:
+        """Returns the path, size, modification time and content hash of the input file
+
+        Returns:
+            dict: identifies the current version of the input file
+        """
+
+        stat = os.stat(self.input_file)
+        content_hash = hashlib.blake2b(digest_size=16)
+        with open(self.input_file, "rb") as f:
+            for block in iter(lambda: f.read(2**20), b""):
+                content_hash.update(block)
+
+        return {
+            "input_file": os.path.abspath(self.input_file),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "content_hash": content_hash.hexdigest()
+        }
+
+    def read_metadata(self, entry_path):
+        """Reads the metadata of a cache entry
+
+        Args:
+            entry_path (str): Path of the cache entry
+
+        Returns:
+            dict | None: contains the metadata, None if the entry does not exist or is unreadable
+        """
+
+        try:
+            with open(os.path.join(entry_path, self.metadata_filename), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def contains(self, columns=None) -> bool:
+        """Checks whether the entry of the input file holds the given columns
+
+        Args:
+            columns (list, optional): contains the column names, all columns of the input file by default. Defaults to None.
+
+        Returns:
+            bool: True if the columns can be loaded from the cache
+        """
+
+        if self.metadata is None:
+            return False
+        if columns is None:
+            columns = self.metadata["columns"]
+        return all(column in self.metadata["cached_columns"] for column in columns)
+
+    def load_column(self, column, start, stop, as_categorical=False):
+        """Loads a slice of a cached column
+
+        Args:
+            column (str): Name of the column
+            start (int): First row of the slice
+            stop (int): Row after the last row of the slice
+            as_categorical (bool, optional): returns coded columns as categoricals instead of labels. Defaults to False.
+
+        Returns:
+            np.ndarray | pd.Categorical: contains the values of the slice
+        """
+
+        info = self.metadata["cached_columns"][column]
+        if self.metadata["rows"]:
+            values = np.memmap(os.path.join(self.entry_path, info["file"]), dtype=info["dtype"],
+                               mode="r", shape=(self.metadata["rows"],))[start:stop]
+        else:
+            values = np.empty(0, dtype=info["dtype"])
+
+        if "labels" not in info:
+            return np.array(values)
+        if column not in self.labels:
+            self.labels[column] = LabelDictionary(
+                info["labels"]).get_typed_labels()
+        if as_categorical:
+            return pd.Categorical.from_codes(values, categories=self.labels[column])
+        return self.labels[column].take(values, allow_fill=True, fill_value=np.nan).to_numpy()
+
+    def load(self, categorical_columns=()) -> pd.DataFrame:
+        """Loads all columns of the input file from the cache
+
+        Args:
+            categorical_columns (Iterable, optional): contains the coded columns returned as categoricals. Defaults to ().
+
+        Returns:
+            pd.DataFrame: contains the input file
+        """
+
+        self.touch()
+        rows = self.metadata["rows"]
+        return pd.DataFrame({column: self.load_column(column, 0, rows, column in categorical_columns)
+                             for column in self.metadata["columns"]})
+
+    def iter_chunks(self, columns, chunksize):
+        """Loads the given columns of the input file from the cache in chunks, with coded columns as categoricals
+
+        Args:
+            columns (list): contains the column names
+            chunksize (int | None): number of rows per chunk, None loads all rows in one chunk
+
+        Yields:
+            pd.DataFrame: contains a chunk of the input file
+        """
+
+        self.touch()
+        rows = self.metadata["rows"]
+        chunksize = chunksize or max(rows, 1)
+        for start in range(0, rows, chunksize):
+            yield pd.DataFrame({column: self.load_column(column, start, start+chunksize, True) for column in columns})
+
+    def write(self, chunks, columns, label_columns):
+        """Writes chunks of the input file into its cache entry while passing them on unchanged, so they are processed in the same pass
+           The entry is only published once all chunks are written
+
+        Args:
+            chunks (Iterable): contains the chunks of the input file as pd.DataFrame
+            columns (list): contains all column names of the input file
+            label_columns (list): contains the columns stored as codes into a label dictionary, the others are stored as raw arrays
+
+        Yields:
+            pd.DataFrame: contains a chunk of the input file
+        """
+
+        temporary_path = self.entry_path + ".tmp"
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        Path(temporary_path).mkdir(parents=True, exist_ok=True)
+
+        dictionaries = {}
+        cached_columns = {}
+        rows = 0
+        try:
+            for chunk in chunks:
+                for column in chunk.columns:
+                    if column not in cached_columns:
+                        cached_columns[column] = {
+                            "file": f"column_{len(cached_columns)}.bin"}
+                    info = cached_columns[column]
+
+                    if column in label_columns:
+                        dictionaries.setdefault(column, LabelDictionary())
+                        values = dictionaries[column].encode(chunk[column])
+                    else:
+                        values = chunk[column].to_numpy(
+                            dtype=info.get("dtype"))
+                    info.setdefault("dtype", values.dtype.str)
+
+                    with open(os.path.join(temporary_path, info["file"]), "ab") as f:
+                        values.tofile(f)
+                rows += len(chunk)
+                yield chunk
+
+            for column, dictionary in dictionaries.items():
+                cached_columns[column]["labels"] = dictionary.labels.tolist()
+            metadata = {"version": self.version, "file_key": self.file_key, "rows": rows,
+                        "columns": list(columns), "cached_columns": cached_columns}
+            with open(os.path.join(temporary_path, self.metadata_filename), "w", encoding='utf-8') as f:
+                json.dump(metadata, f)
+
+            shutil.rmtree(self.entry_path, ignore_errors=True)
+            os.replace(temporary_path, self.entry_path)
+            self.metadata = metadata
+            self.labels = {}
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+        self.evict()
+
+    def save(self, data):
+        """Writes a fully loaded input file into its cache entry
+
+        Args:
+            data (pd.DataFrame): contains the input file
+        """
+
+        label_columns = [column for column in data.columns if data[column].dtype ==
+                         object or isinstance(data[column].dtype, pd.CategoricalDtype)]
+        for _ in self.write([data], data.columns, label_columns):
+            pass
+
+    def touch(self):
+        """Marks the entry of the input file as recently used
+        """
+
+        os.utime(os.path.join(self.entry_path, self.metadata_filename))
+
+    def evict(self):
+        """Removes the stale entries of the input file and then the least recently used entries until the cache fits its size
+           Temporary entries and entries without metadata may be written by another process, e.g. another input worker, and are only removed once abandoned
+        """
+
+        entries = []
+        for entry in os.listdir(self.cache_path):
+            entry_path = os.path.join(self.cache_path, entry)
+            if entry_path == self.entry_path:
+                continue
+            try:
+                metadata = None if entry.endswith(
+                    ".tmp") else self.read_metadata(entry_path)
+                if metadata is None:
+                    if time.time() - os.path.getmtime(entry_path) > self.abandoned_seconds:
+                        shutil.rmtree(entry_path, ignore_errors=True)
+                    continue
+                if metadata.get("file_key", {}).get("input_file") == self.file_key["input_file"]:
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                    continue
+                entries.append((os.path.getmtime(os.path.join(entry_path, self.metadata_filename)),
+                                entry_path, self.get_entry_size(entry_path)))
+            except OSError:
+                # published or removed by another process meanwhile
+                continue
+
+        total_size = self.get_entry_size(
+            self.entry_path) + sum(size for _, _, size in entries)
+        for _, entry_path, size in sorted(entries):
+            if total_size <= self.cache_size:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+    def get_entry_size(self, entry_path) -> int:
+        """Returns the size of a cache entry
+
+        Args:
+            entry_path (str): Path of the cache entry
+
+        Returns:
+            int: size in bytes
+        """
+
+        return sum(entry.stat().st_size for entry in os.scandir(entry_path) if entry.is_file())
+
+
+class AggregateState:
+    """Responsible for persisting the count tables of an append-only input file, so that later runs only fold in the rows appended since
+       The state is only reused if its version, the column and status settings and the already processed part of the input file are unchanged
+    """
+
+    version = 3
+    block_size = 2**20
+    metadata_filename = "state.json"
+
+    def __init__(self, input_file, state_path="state"):
+        """Constructor for the state of an input file
+
+        Args:
+            input_file (str): Filename of the input .csv file
+            state_path (str, optional): Path where the states are saved at. Defaults to "state".
+        """
+        self.input_file = input_file
+        entry = hashlib.blake2b(os.path.abspath(
+            input_file).encode(), digest_size=16).hexdigest()
+        self.state_path = os.path.join(state_path, entry)
+        # offset and hash of the part of the input file hashed last, which a later hash of a longer part continues from
+        self.hashed = (0, hashlib.blake2b(digest_size=16))
+
+    def get_settings(self, conf) -> dict:
+        """Returns the settings the count tables depend on
+
+        Args:
+            conf (dict): contains user options
+
+        Returns:
+            dict: contains the column names and the accepted status
+        """
+
+        settings = {key: conf[key] for key in ["customer_column_name", "seller_column_name", "product_column_name",
+                                               "status_column_name", "status_accepted"]}
+        settings["date_column_name"] = conf.get("date_column_name")
+        return settings
+
+    def get_prefix_hash(self, offset) -> str:
+        """Returns a hash of the already processed part of the input file
+           Hashing continues from the part hashed last, so checking the state and saving it after the appended rows read the input file only once
+
+        Args:
+            offset (int): size of the processed part in bytes
+
+        Returns:
+            str: the hash
+        """
+
+        hashed_offset, prefix_hash = self.hashed
+        if hashed_offset > offset:
+            hashed_offset, prefix_hash = 0, hashlib.blake2b(digest_size=16)
+        prefix_hash = prefix_hash.copy()
+        with open(self.input_file, "rb") as f:
+            f.seek(hashed_offset)
+            while hashed_offset < offset:
+                block = f.read(min(self.block_size, offset-hashed_offset))
+                if not block:
+                    break
+                prefix_hash.update(block)
+                hashed_offset += len(block)
+        self.hashed = (hashed_offset, prefix_hash)
+        return prefix_hash.hexdigest()
+
+    def load(self, aggregator, conf, columns) -> int:
+        """Restores the persisted count tables into an aggregator if the state is still valid
+
+        Args:
+            aggregator (SalesAggregator): receives the count tables
+            conf (dict): contains user options
+            columns (list): contains the column names of the input file
+
+        Returns:
+            int: size in bytes of the already processed part of the input file, 0 if the state could not be used
+        """
+
+        try:
+            with open(os.path.join(self.state_path, self.metadata_filename), encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        if metadata.get("version") != self.version:
+            logging.warning(
+                f"Incremental state of {self.input_file} has an outdated version. Recomputing from the full input file.")
+            return 0
+        if metadata["settings"] != self.get_settings(conf) or metadata["columns"] != list(columns):
+            logging.warning(
+                f"Incremental state of {self.input_file} was computed with different settings. Recomputing from the full input file.")
+            return 0
+        if os.path.getsize(self.input_file) < metadata["offset"] or self.get_prefix_hash(metadata["offset"]) != metadata["prefix_hash"]:
+            logging.warning(
+                f"{self.input_file} was changed and not only appended to. Recomputing from the full input file.")
+            return 0
+
+        with np.load(os.path.join(self.state_path, metadata["arrays_filename"])) as arrays:
+            aggregator.set_state(dict(arrays), metadata["labels"])
+        return metadata["offset"]
+
+    def save(self, aggregator, conf, columns, offset):
+        """Persists the count tables of an aggregator
+
+        Args:
+            aggregator (SalesAggregator): contains the count tables
+            conf (dict): contains user options
+            columns (list): contains the column names of the input file
+            offset (int): size in bytes of the processed part of the input file
+        """
+
+        arrays, labels = aggregator.get_state()
+        arrays_filename = f"aggregates_{offset}.npz"
+        metadata = {"version": self.version, "settings": self.get_settings(conf), "columns": list(columns),
+                    "offset": offset, "prefix_hash": self.get_prefix_hash(offset), "labels": labels,
+                    "arrays_filename": arrays_filename}
+
+        # the arrays are written under a new name and the metadata pointing to them is replaced last, so an interrupted save keeps the previous state
+        Path(self.state_path).mkdir(parents=True, exist_ok=True)
+        with open(os.path.join(self.state_path, arrays_filename), "wb") as f:
+            np.savez(f, **arrays)
+        with open(os.path.join(self.state_path, self.metadata_filename + ".tmp"), "w", encoding='utf-8') as f:
+            json.dump(metadata, f)
+        os.replace(os.path.join(self.state_path, self.metadata_filename + ".tmp"),
+                   os.path.join(self.state_path, self.metadata_filename))
+
+        for filename in os.listdir(self.state_path):
+            if filename.endswith(".npz") and filename != arrays_filename:
+                os.remove(os.path.join(self.state_path, filename))
+
+
+class FileRange(io.RawIOBase):
+    """Responsible for streaming the header line of an input file followed by the bytes between two offsets, so that pandas parses them like a file of their own
+    """
+
+    def __init__(self, input_file, offset, size):
+        """Constructor for the stream of a byte range of an input file
+
+        Args:
+            input_file (str): Filename of the input .csv file
+            offset (int): byte offset the range starts at
+            size (int): byte offset the range ends at
+        """
+        self.file = open(input_file, "rb")
+        self.header = self.file.readline()
+        self.file.seek(offset)
+        self.remaining = max(size-offset, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Copies the next bytes of the header and then of the range into buffer
+
+        Args:
+            buffer (memoryview): buffer to fill
+
+        Returns:
+            int: number of bytes copied, 0 at the end of the range
+        """
+
+        if self.header:
+            n = min(len(buffer), len(self.header))
+            buffer[:n], self.header = self.header[:n], self.header[n:]
+            return n
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+class CompressedReader:
+    """Responsible for reading a gzip or bz2 compressed input file in a pipeline
+       A reader thread decompresses blocks and cuts them at line ends, worker processes parse the blocks into categorical chunks, and the chunks are handed on in order as soon as they are parsed, so decompression, parsing and counting overlap
+       Quoted values must not contain line breaks, since blocks are cut at every line end
+    """
+
+    compressions = {".gz": gzip, ".bz2": bz2}
+
+    def __init__(self, input_file, workers=0, block_size=2**24):
+        """Constructor for the pipeline of a compressed input file
+
+        Args:
+            input_file (str): Filename of the compressed .csv file
+            workers (int, optional): number of processes parsing the blocks, 0 uses one per CPU. Defaults to 0.
+            block_size (int, optional): decompressed bytes per block. Defaults to 2**24.
+        """
+        self.input_file = input_file
+        self.workers = workers or os.cpu_count() or 1
+        self.block_size = block_size
+        self.throughput = None
+        self.reader = None
+
+    @classmethod
+    def is_compressed(cls, input_file) -> bool:
+        """Checks whether an input file is gzip or bz2 compressed by its extension
+
+        Args:
+            input_file (str): Filename of the input file
+
+        Returns:
+            bool: True if the input file is compressed
+        """
+
+        return Path(input_file).suffix.lower() in cls.compressions
+
+    def read_blocks(self, stream, blocks, stop):
+        """Decompresses the input file into blocks that end at a line end, runs in the reader thread
+
+        Args:
+            stream (io.BufferedIOBase): the decompressing stream after the header line
+            blocks (queue.Queue): receives the blocks as bytes, an exception if reading fails and None at the end
+            stop (threading.Event): set if the blocks are no longer read, e.g. after a parse error
+        """
+
+        def put(item) -> bool:
+            # a full queue is waited on only until the blocks are no longer read
+            while not stop.is_set():
+                try:
+                    blocks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            remainder = b""
+            while not stop.is_set():
+                block = stream.read(self.block_size)
+                if not block:
+                    break
+                self.decompressed_size += len(block)
+                block = remainder + block
+                end = block.rfind(b"\n") + 1
+                if block[:end].strip() and not put(block[:end]):
+                    return
+                remainder = block[end:]
+            if remainder.strip():
+                put(remainder)
+        except Exception as e:
+            put(e)
+        finally:
+            stream.close()
+            put(None)
+
+    @staticmethod
+    def parse_block(block, columns, usecols):
+        """Parses a block of lines into a chunk of categorical columns, possibly in a worker process
+
+        Args:
+            block (bytes): contains complete lines of the input file
+            columns (list): contains the column names of the input file
+            usecols (list): contains the column names to parse
+
+        Returns:
+            pd.DataFrame: contains the parsed columns as categoricals
+        """
+
+        return pd.read_csv(io.BytesIO(block), header=None, names=columns, usecols=usecols, dtype=dict.fromkeys(usecols, "category"))
+
+    def iter_chunks(self, usecols):
+        """Reads the input file through the pipeline
+
+        Args:
+            usecols (list): contains the column names to parse
+
+        Yields:
+            pd.DataFrame: the parsed chunks in the order of the input file
+        """
+
+        start = time.perf_counter()
+        self.decompressed_size = 0
+        stream = self.compressions[Path(self.input_file).suffix.lower()].open(
+            self.input_file, "rb")
+        header = stream.readline()
+        self.decompressed_size += len(header)
+        columns = list(pd.read_csv(io.BytesIO(header), nrows=0).columns)
+
+        blocks = queue.Queue(maxsize=2*self.workers)
+        stop = threading.Event()
+        self.reader = threading.Thread(target=self.read_blocks, args=(
+            stream, blocks, stop), daemon=True)
+        self.reader.start()
+        # the workers are spawned rather than forked, since a fork could copy a lock held by the reader thread
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(
+            "spawn")) if self.workers > 1 else None
+        try:
+            pending = deque()
+            while True:
+                block = blocks.get()
+                if isinstance(block, Exception):
+                    raise block
+                if block is None:
+                    break
+                if executor is None:
+                    yield self.parse_block(block, columns, usecols)
+                    continue
+                # keep a few blocks per worker in flight and hand on the oldest one as soon as it is parsed
+                pending.append(executor.submit(
+                    self.parse_block, block, columns, usecols))
+                if len(pending) >= 2*self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # a reader thread blocked on the full queue is released, so that it closes the input file and ends
+            stop.set()
+            while True:
+                try:
+                    blocks.get_nowait()
+                except queue.Empty:
+                    break
+            self.reader.join()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        seconds = time.perf_counter() - start
+        compressed_mb = os.path.getsize(self.input_file)/2**20
+        decompressed_mb = self.decompressed_size/2**20
+        self.throughput = {"seconds": round(seconds, 6), "compressed_mb": round(compressed_mb, 3), "decompressed_mb": round(decompressed_mb, 3),
+                           "compressed_mb_per_s": round(compressed_mb/seconds, 3), "decompressed_mb_per_s": round(decompressed_mb/seconds, 3)}
+        logging.info(f"Read {compressed_mb:.1f} MB compressed, {decompressed_mb:.1f} MB decompressed from {self.input_file} in {seconds:.2f} s "
+                     f"with {self.workers} parse workers: {compressed_mb/seconds:.1f} MB/s compressed, {decompressed_mb/seconds:.1f} MB/s decompressed")
+
+
 class DataLoader:
     """Responsible for reading an input .csv file
     """
 
+    # rows per chunk of an incremental read if no chunksize is set
+    appended_chunksize = 2**20
+
     def __init__(self, input_file):
         """Constructor for reading a .csv file
 
@@ -98,6 +1670,86 @@ class DataLoader:
         """
         self.input_file = input_file
 
+    def select_input_file(self, conf):
+        """Lets the user select the input file if the configured one does not exist and conf["select_input"] is set
+           tkinter is only imported when the file dialog is actually opened
+
+        Args:
+            conf (dict): contains user options
+
+        Raises:
+            FileNotFoundError: functions fails if the input file does not exist and no file dialog may be opened, or no file is selected in it
+        """
+
+        if not os.path.isfile(self.input_file):
+            if not conf.get("select_input"):
+                raise FileNotFoundError(
+                    f"Input file not found: {self.input_file}")
+
+            import tkinter as tk
+            from tkinter import filedialog
+
+            root = tk.Tk()
+            root.withdraw()
+
+            conf["input_file"] = filedialog.askopenfilename()
+            if conf["input_file"] == "":
+                raise FileNotFoundError(
+                    "No file was selected. Restart the tool and select a file.")
+            self.input_file = conf["input_file"]
+
+    def open_cache(self, conf):
+        """Opens the cache entry of the input file if caching is enabled
+
+        Args:
+            conf (dict): contains user options
+
+        Returns:
+            DataCache | None: the cache entry, None if caching is disabled
+        """
+
+        if not conf.get("use_cache"):
+            return None
+        return DataCache(self.input_file, conf.get("cache_path", "cache"), conf.get("cache_size_mb", 1024))
+
+    def get_required_columns(self, conf) -> list:
+        """Returns the columns the input file has to contain
+
+        Args:
+            conf (dict): contains user options
+
+        Returns:
+            list: contains the names of the required columns
+        """
+
+        required_columns = [
+            conf["customer_column_name"],
+            conf["seller_column_name"],
+            conf["product_column_name"],
+            conf["status_column_name"]
+        ]
+        if conf.get("date_column_name"):
+            required_columns.append(conf["date_column_name"])
+        return required_columns
+
+    def check_columns(self, columns, conf):
+        """Checks that all required columns are available
+
+        Args:
+            columns (Iterable): contains the column names of the input file
+            conf (dict): contains user options
+
+        Raises:
+            ValueError: functions fails if the .csv file is not appropriately formated due to ommited columns
+        """
+
+        missing_columns = [
+            col for col in self.get_required_columns(conf) if col not in columns]
+
+        if missing_columns:
+            raise ValueError(
+                f"{conf['input_file']}: Missing required columns: {', '.join(missing_columns)}")
+
     def read_data(self, conf):
         """Reads a configuration file and saves the user options to a dictionary
 
@@ -113,45 +1765,413 @@ class DataLoader:
 
         try:
             # Read data from the input file
-            if not os.path.isfile(self.input_file):
-                root = tk.Tk()
-                root.withdraw()
+            self.select_input_file(conf)
+            cache = self.open_cache(conf)
+            if cache is not None and cache.contains():
+                logging.info(
+                    f"Reading {self.input_file} from the cache: {cache.entry_path}")
+                self.data = cache.load(
+                    self.get_required_columns(conf) if conf.get("encode_columns") else ())
+            else:
+                self.data = pd.read_csv(self.input_file)
+                if cache is not None:
+                    cache.save(self.data)
+            self.check_columns(self.data.columns, conf)
+            if conf.get("encode_columns"):
+                self.encode_data(conf)
+
+        except Exception as e:
+            # Handle any exceptions raised during data reading or column checking
+            logging.error(f"An error occurred while reading data: {e}")
+            self.data = None  # Set data to None to indicate failure
+            raise
+
+        conf["customers"] = list(
+            self.data[conf["customer_column_name"]].unique())
+        conf["customers"].sort(reverse=False)
+        return self.data
+
+    def encode_data(self, conf):
+        """Encodes the customer, seller, product and status columns of the loaded data as categoricals and reports the memory used before and after
+
+        Args:
+            conf (dict): contains user options
+        """
+
+        memory_before = self.data.memory_usage(deep=True).sum()
+        for column in self.get_required_columns(conf):
+            self.data[column] = self.data[column].astype("category")
+        memory_after = self.data.memory_usage(deep=True).sum()
+
+        logging.info(
+            f"Encoded {len(self.data)} rows: memory used {memory_before/2**20:.2f} MB before, {memory_after/2**20:.2f} MB after")
+
+    @staticmethod
+    def get_string_memory_usage(data) -> int:
+        """Returns the memory a chunk would use with its categorical columns kept as strings, as memory_usage(deep=True) counts it
+
+        Args:
+            data (pd.DataFrame): contains columns read as categoricals
+
+        Returns:
+            int: memory in bytes
+        """
+
+        memory = data.memory_usage(index=True, deep=True)
+        for column in data.columns:
+            values = data[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                continue
+            # a pointer per row and the size of every row's label, a missing value is a float object
+            label_sizes = np.array([sys.getsizeof(label) for label in values.cat.categories] + [
+                                   sys.getsizeof(np.nan)], dtype=np.int64)
+            memory[column] = 8*len(values) + \
+                label_sizes[values.cat.codes.to_numpy()].sum()
+        return int(memory.sum())
+
+    def is_partitioned(self) -> bool:
+        """Checks whether the input file is a directory or a glob pattern of several input files
+
+        Returns:
+            bool: True if the input consists of several files
+        """
+
+        # an existing file whose name contains a glob character is a single input file
+        if os.path.isfile(self.input_file):
+            return False
+        return os.path.isdir(self.input_file) or any(character in self.input_file for character in "*?[")
+
+    def get_input_files(self) -> list:
+        """Returns the input files, all .csv files of the directory or all files matching the glob pattern of a partitioned input
+
+        Returns:
+            list: contains the sorted filenames of the input files
+        """
+
+        if os.path.isdir(self.input_file):
+            return sorted(path for pattern in ["*.csv", "*.csv.gz", "*.csv.bz2"]
+                          for path in glob.glob(os.path.join(glob.escape(self.input_file), pattern)))
+        if self.is_partitioned():
+            return sorted(path for path in glob.glob(self.input_file) if os.path.isfile(path))
+        return [self.input_file]
+
+    @staticmethod
+    def aggregate_file(input_file, conf):
+        """Reads a single input file of a partitioned input into count tables, possibly in a worker process
+
+        Args:
+            input_file (str): Filename of the input .csv file
+            conf (dict): contains user options
+
+        Returns:
+            SalesAggregator: contains the count tables of the input file
+        """
+
+        return DataLoader(input_file).aggregate_data(dict(conf, input_file=input_file))
+
+    def aggregate_files(self, conf):
+        """Reads every file of a partitioned input into partial count tables in parallel and merges them
+           The files are processed by conf["input_workers"] worker processes, by default one per CPU
+
+        Args:
+            conf (dict): contains user options
+
+        Raises:
+            FileNotFoundError: functions fails if no input file matches
+
+        Returns:
+            SalesAggregator: contains the count tables of all input files
+        """
+
+        try:
+            input_files = self.get_input_files()
+            if not input_files:
+                raise FileNotFoundError(
+                    f"No input files found: {self.input_file}")
+            logging.info(
+                f"Reading {len(input_files)} input files from {self.input_file}")
+
+            workers = min(conf.get("input_workers")
+                          or os.cpu_count() or 1, len(input_files))
+            if workers > 1:
+                # compressed files are parsed within their worker process
+                # the workers are spawned rather than forked, since the query service reloads from a thread next to its server threads
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    partial_aggregators = list(executor.map(
+                        self.aggregate_file, input_files, [dict(conf, parse_workers=1)]*len(input_files)))
+            else:
+                partial_aggregators = [self.aggregate_file(
+                    input_file, conf) for input_file in input_files]
+
+            self.aggregator = partial_aggregators[0]
+            self.aggregator.merge(*partial_aggregators[1:])
+
+        except Exception as e:
+            logging.error(f"An error occurred while reading data: {e}")
+            self.aggregator = None
+            raise
+
+        conf["customers"] = self.aggregator.get_customers()
+        return self.aggregator
+
+    def aggregate_data(self, conf):
+        """Reads the input file in chunks of conf["chunksize"] rows and folds every chunk into running count tables
+           Only the count tables are kept, so the memory used does not grow with the number of rows
+           In incremental mode the count tables are persisted, and later runs only read the rows appended to the input file since
+
+        Args:
+            conf (dict): contains user options
+
+        Raises:
+            ValueError: functions fails if the .csv file is not appropriately formated due to ommited columns
+
+        Returns:
+            SalesAggregator: contains the count tables of the input file
+        """
+
+        try:
+            self.select_input_file(conf)
+            columns = pd.read_csv(self.input_file, nrows=0).columns
+            self.check_columns(columns, conf)
+
+            self.aggregator = SalesAggregator(
+                conf["seller_column_name"], conf["customer_column_name"], conf["product_column_name"],
+                conf["status_column_name"], conf["status_accepted"], conf.get("date_column_name"))
+            required_columns = self.get_required_columns(conf)
+            # the key columns are read as strings, so that chunks cannot guess their types differently
+            dtype = dict.fromkeys(
+                [conf["customer_column_name"], conf["seller_column_name"], conf["product_column_name"],
+                 conf["status_column_name"]], "category" if conf.get("encode_columns") else str)
+            chunksize = conf.get("chunksize") or None
+
+            compressed = CompressedReader.is_compressed(self.input_file)
+            incremental = conf.get("incremental") and not compressed
+            if conf.get("incremental") and compressed:
+                logging.warning(
+                    f"Incremental mode does not support compressed input files, reading all of {self.input_file}")
+
+            offset = 0
+            if incremental:
+                state = AggregateState(
+                    self.input_file, conf.get("state_path", "state"))
+                size = os.path.getsize(self.input_file)
+                # a last line without a line end may still be being written, the state only holds the lines before it
+                complete_size = self.get_complete_size(size)
+                offset = state.load(self.aggregator, conf, columns)
+
+            cache = self.open_cache(conf)
+            if offset:
+                logging.info(
+                    f"Reading {complete_size-offset} bytes appended to {self.input_file} since the last run")
+                chunks = self.read_appended_rows(
+                    offset, complete_size, required_columns, dtype, chunksize)
+            elif incremental:
+                # rows appended while this run reads the input file are left to the next run
+                chunks = self.read_appended_rows(
+                    self.get_header_size(), complete_size, required_columns, dtype, chunksize)
+            elif cache is not None and cache.contains(required_columns):
+                logging.info(
+                    f"Reading {self.input_file} from the cache: {cache.entry_path}")
+                chunks = cache.iter_chunks(required_columns, chunksize)
+            elif compressed:
+                chunks = CompressedReader(self.input_file, conf.get(
+                    "parse_workers", 0)).iter_chunks(required_columns)
+                if cache is not None:
+                    chunks = cache.write(
+                        chunks, columns, required_columns)
+            else:
+                chunks = pd.read_csv(
+                    self.input_file, usecols=required_columns, dtype=dtype, chunksize=chunksize)
+                if chunksize is None:
+                    chunks = [chunks]
+                if cache is not None:
+                    chunks = cache.write(
+                        chunks, columns, required_columns)
+
+            # the memory of the chunks read as categoricals is reported like that of an encoded read_data
+            encoded = conf.get("encode_columns") or compressed
+            rows, memory_before, memory_after = 0, 0, 0
+            for chunk in chunks:
+                if encoded:
+                    rows += len(chunk)
+                    memory_before += self.get_string_memory_usage(chunk)
+                    memory_after += chunk.memory_usage(deep=True).sum()
+                self.aggregator.update(chunk)
+            if encoded and rows:
+                logging.info(
+                    f"Encoded {rows} rows: memory used {memory_before/2**20:.2f} MB before, {memory_after/2**20:.2f} MB after")
+
+            if incremental:
+                state.save(self.aggregator, conf, columns, complete_size)
+                # the unfinished last line is counted for this run only and read again with the rows appended to it
+                for chunk in self.read_appended_rows(
+                        complete_size, size, required_columns, dtype, chunksize):
+                    self.aggregator.update(chunk)
+
+        except Exception as e:
+            logging.error(f"An error occurred while reading data: {e}")
+            self.aggregator = None
+            raise
+
+        conf["customers"] = self.aggregator.get_customers()
+        return self.aggregator
+
+    def aggregate_database(self, conf):
+        """Counts the sales of the table conf["database_table"] of the SQLite database conf["database_file"] with GROUP BY queries
+           Only the count tables are loaded from the database, never the sales themselves
+           Dates are converted by SQLite and therefore have to be in a format its date() function understands, e.g. YYYY-MM-DD
+
+        Args:
+            conf (dict): contains user options
+
+        Raises:
+            FileNotFoundError: functions fails if the database file does not exist
+            ValueError: functions fails if the table does not exist or misses required columns
+
+        Returns:
+            SalesAggregator: contains the count tables of the table
+        """
+
+        try:
+            database_file = conf["database_file"]
+            table = conf.get("database_table", "sales")
+            if not os.path.isfile(database_file):
+                raise FileNotFoundError(
+                    f"Database file not found: {database_file}")
+
+            with closing(sqlite3.connect(f"{Path(database_file).resolve().as_uri()}?mode=ro", uri=True)) as connection:
+                columns = [row[1] for row in connection.execute(
+                    f"PRAGMA table_info({self.quote(table)})")]
+                if not columns:
+                    raise ValueError(
+                        f"{database_file}: Table not found: {table}")
+                self.check_columns(columns, dict(
+                    conf, input_file=f"{database_file}:{table}"))
+
+                self.aggregator = SalesAggregator(
+                    conf["seller_column_name"], conf["customer_column_name"], conf["product_column_name"],
+                    conf["status_column_name"], conf["status_accepted"], conf.get("date_column_name"))
+                seller, customer, product, status = [self.quote(conf[key]) for key in [
+                    "seller_column_name", "customer_column_name", "product_column_name", "status_column_name"]]
+                counts = f'SUM(CASE WHEN {status} = ? THEN 1 ELSE 0 END) AS "accepted", COUNT({status}) AS "offers", COUNT(*) AS "rows"'
+                accepted = (conf["status_accepted"],)
+
+                start = time.perf_counter()
+                offer_counts = pd.read_sql_query(f"SELECT {seller}, {customer}, {counts} FROM {self.quote(table)} GROUP BY {seller}, {customer}",
+                                                 connection, params=accepted)
+                product_counts = pd.read_sql_query(f"SELECT {customer}, {product}, {counts} FROM {self.quote(table)} GROUP BY {customer}, {product}",
+                                                   connection, params=accepted)
+                daily_counts = None
+                if conf.get("date_column_name"):
+                    day = f"CAST(julianday(date({self.quote(conf['date_column_name'])})) - 2440587.5 AS INTEGER)"
+                    daily_counts = pd.read_sql_query(f"""SELECT {day} AS {self.quote(conf['date_column_name'])}, {seller}, {customer}, {counts} FROM {self.quote(table)}
+                                                         WHERE {day} IS NOT NULL GROUP BY 1, {seller}, {customer}""", connection, params=accepted)
+                logging.info(
+                    f"Counted the sales of {database_file}:{table} in {time.perf_counter()-start:.3f} s")
+
+            self.aggregator.merge_counts(self.encode_counts(offer_counts, [conf["seller_column_name"], conf["customer_column_name"]]),
+                                         self.encode_counts(product_counts, [conf["customer_column_name"], conf["product_column_name"]]).drop(
+                                             columns="offers"),
+                                         None if daily_counts is None else self.encode_counts(daily_counts, [conf["date_column_name"], conf["seller_column_name"], conf["customer_column_name"]]))
+
+        except Exception as e:
+            logging.error(f"An error occurred while reading data: {e}")
+            self.aggregator = None
+            raise
+
+        conf["customers"] = self.aggregator.get_customers()
+        return self.aggregator
+
+    @staticmethod
+    def quote(identifier) -> str:
+        """Quotes the name of a table or column for SQL
+
+        Args:
+            identifier (str): Name of the table or column
+
+        Returns:
+            str: the quoted name
+        """
+
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def encode_counts(self, counts, columns) -> pd.DataFrame:
+        """Indexes grouped counts read from a database by the codes of their labels
+
+        Args:
+            counts (pd.DataFrame): contains the label columns and the counts
+            columns (list): contains the label columns, a date column is already coded as days
+
+        Returns:
+            pd.DataFrame: contains the counts indexed by the codes
+        """
+
+        codes = [counts[column].to_numpy(dtype=np.int32) if column not in self.aggregator.dictionaries else self.aggregator.encode(column, counts[column])
+                 for column in columns]
+        return counts.drop(columns=columns).set_axis(pd.MultiIndex.from_arrays(codes, names=columns), axis=0).astype(np.int64)
+
+    def get_header_size(self) -> int:
+        """Returns the size of the header line of the input file
+
+        Returns:
+            int: size in bytes of the header line including its line end
+        """
 
-                conf["input_file"] = filedialog.askopenfilename()
-                if conf["input_file"] == "":
-                    logging.error(
-                        "No file was selected. Restart the tool and select a file.")
-                    os._exit(1)
+        with open(self.input_file, "rb") as f:
+            return len(f.readline())
 
-            self.data = pd.read_csv(self.input_file)
+    def get_complete_size(self, size) -> int:
+        """Returns the size of the input file up to the end of its last line end
 
-            required_columns = [
-                conf["customer_column_name"],
-                conf["seller_column_name"],
-                conf["product_column_name"],
-                conf["status_column_name"]
-            ]
+        Args:
+            size (int): size of the input file in bytes
 
-            missing_columns = [
-                col for col in required_columns if col not in self.data.columns]
+        Returns:
+            int: byte offset after the last line end, 0 if there is none
+        """
 
-            if missing_columns:
-                raise ValueError(
-                    f"{conf['input_file']}: Missing required columns: {', '.join(missing_columns)}")
+        end = size
+        with open(self.input_file, "rb") as f:
+            while end > 0:
+                start = max(end-2**16, 0)
+                f.seek(start)
+                line_end = f.read(end-start).rfind(b"\n")
+                if line_end >= 0:
+                    return start + line_end + 1
+                end = start
+        return 0
+
+    def read_appended_rows(self, offset, size, required_columns, dtype, chunksize):
+        """Reads the rows between two byte offsets of the input file
+           The rows are parsed after the header line of the input file, so that a row with missing values is read as in a full read
+           The bytes are streamed from the input file, so that only one chunk of rows is held in memory
 
-        except Exception as e:
-            # Handle any exceptions raised during data reading or column checking
-            logging.error(f"An error occurred while reading data: {e}")
-            self.data = None  # Set data to None to indicate failure
-            os._exit(1)
+        Args:
+            offset (int): byte offset after the already processed rows
+            size (int): byte offset up to which the rows are read
+            required_columns (list): contains the column names to read
+            dtype (dict | None): contains the types of the columns to read
+            chunksize (int | None): number of rows per chunk, appended_chunksize rows if None
+
+        Yields:
+            pd.DataFrame: chunk of the rows between the two offsets
+        """
 
-        conf["customers"] = list(
-            self.data[conf["customer_column_name"]].unique())
-        conf["customers"].sort(reverse=False)
-        return self.data
+        if size <= offset:
+            return
+        with io.BufferedReader(FileRange(self.input_file, offset, size)) as f:
+            for chunk in pd.read_csv(f, usecols=required_columns, dtype=dtype, chunksize=chunksize or self.appended_chunksize):
+                if len(chunk):
+                    yield chunk
+
+REPORTS = ("unoffered_products", "seller_effectiveness",
+           "seller_coverage", "product_recommendations", "seller_time_series")
+DEFAULT_REPORTS = REPORTS[:3]
 
 
 class DataAnalyzer:
+    output_formats = ("png", "csv", "parquet", "html")
+
     def __init__(self, conf, input_file="input_sales.csv", results_path="results"):
         """Responsible for analyzing csv files of sellers and customers
 
@@ -174,7 +2194,24 @@ class DataAnalyzer:
             "unoferred_products_filename": "Unoffered_Products.png",
             "seller_coverage_column": "Total Coverage (%)",
             "seller_effectiveness_filename": "Seller Effectiveness.png",
-            "seller_coverage_filename": "Seller Coverage.png"
+            "seller_coverage_filename": "Seller Coverage.png",
+            "chunksize": 0,
+            "encode_columns": False,
+            "use_cache": False,
+            "cache_path": "cache",
+            "cache_size_mb": 1024,
+            "incremental": False,
+            "state_path": "state",
+            "output_format": "png",
+            "output_workers": 3,
+            "input_workers": 0,
+            "dense_unoffered_limit": 10_000_000,
+            "recommendations_per_customer": 5,
+            "product_recommendations_filename": "Product_Recommendations.png",
+            "date_column_name": None,
+            "rolling_window_days": [30, 90],
+            "seller_time_series_per_customer": False,
+            "seller_time_series_filename": "Seller_Time_Series.png"
         }
         for key, value in default_values.items():
             setattr(self, key, conf.get(key, value))
@@ -182,145 +2219,268 @@ class DataAnalyzer:
         self.unoffered_products = pd.DataFrame()
         self.seller_effectiveness = pd.DataFrame()
         self.seller_offer_coverage = pd.DataFrame()
+        self.product_recommendations = pd.DataFrame()
+        self.seller_time_series = pd.DataFrame()
+        self.unoffered_matrix = None
+        # set if the unoffered products exceed the dense_unoffered_limit and are only saved as (customer, product) pairs
+        self.unoffered_pairs_only = False
+        # names of the REPORTS calculated so far, only these are saved by default
+        self.calculated_reports = set()
+        self.data = None
+        self.aggregator = None
 
         data_loader = DataLoader(self.input_file)
-        self.data = data_loader.read_data(conf)
+        if conf.get("database_file"):
+            self.aggregator = data_loader.aggregate_database(conf)
+        elif data_loader.is_partitioned():
+            self.aggregator = data_loader.aggregate_files(conf)
+        elif self.chunksize or self.incremental or CompressedReader.is_compressed(self.input_file):
+            self.aggregator = data_loader.aggregate_data(conf)
+        else:
+            self.data = data_loader.read_data(conf)
+
+    def calculate_counts(self):
+        """Counts the loaded sales once into the count tables every analysis is produced from
+        """
+
+        self.aggregator = SalesAggregator(
+            self.seller_column_name, self.customer_column_name, self.product_column_name,
+            self.status_column_name, self.status_accepted, self.date_column_name)
+        self.aggregator.update(self.data)
+
+    def get_cardinalities(self) -> dict:
+        """Returns the number of rows and of distinct sellers, customers, products and pairs of them that have been loaded
+
+        Returns:
+            dict: contains the row count and the group cardinalities, only the row count before the sales are counted
+        """
+
+        if self.aggregator is None:
+            return {"rows": len(self.data)}
+
+        offer_counts = self.aggregator.offer_counts
+        product_counts = self.aggregator.product_counts
+        seller_codes = offer_counts.index.get_level_values(
+            self.seller_column_name)
+        customer_codes = product_counts.index.get_level_values(
+            self.customer_column_name)
+        product_codes = product_counts.index.get_level_values(
+            self.product_column_name)
+        return {
+            "rows": int(offer_counts["rows"].sum()),
+            "sellers": int(seller_codes[seller_codes >= 0].nunique()),
+            "customers": int(customer_codes[customer_codes >= 0].nunique()),
+            "products": int(product_codes[product_codes >= 0].nunique()),
+            "seller_customer_pairs": len(offer_counts),
+            "customer_product_pairs": len(product_counts)
+        }
 
     def calculate_unoffered_products(self):
         """Calculates the products which have not been offered to customers yet and saves the results in a 2D pandas Dataframe
+           The offered pairs are kept in a sparse matrix, from which the dense table is only built if it has at most conf["dense_unoffered_limit"] cells
         """
 
-        all_products = set(self.data[self.product_column_name].unique())
-        self.unoffered_products = pd.DataFrame(
-            columns=[self.product_column_name, self.customer_column_name])
-        for customer_name, per_customer_data in self.data.groupby(self.customer_column_name):
-            items_to_be_recommended = list(all_products -
-                                           set(per_customer_data[self.product_column_name].tolist()))
+        if self.aggregator is None:
+            self.calculate_counts()
 
-            the_dict = {self.customer_column_name: [customer_name]*len(items_to_be_recommended),
-                        self.product_column_name: items_to_be_recommended}
+        self.unoffered_matrix = ProductOfferMatrix(self.aggregator)
+        customers, products = self.unoffered_matrix.get_shape()
+        self.unoffered_pairs_only = customers*products > self.dense_unoffered_limit
+        if not self.unoffered_pairs_only:
+            self.unoffered_products = self.unoffered_matrix.to_dense()
+        else:
+            logging.warning(
+                f"The unoffered products of {customers} customers and {products} products exceed the dense_unoffered_limit; they are only saved in long format")
+            self.unoffered_products = pd.DataFrame()
+        self.calculated_reports.add("unoffered_products")
 
-            df_the_dict = pd.DataFrame(
-                the_dict, columns=[self.customer_column_name, self.product_column_name])
+    def get_unoffered_products(self, customer) -> list:
+        """Returns the products which have not been offered to a customer yet
 
-            self.unoffered_products = pd.concat(
-                [self.unoffered_products, df_the_dict], ignore_index=True)
+        Args:
+            customer (str): Name of the customer
 
-            self.data = pd.concat([self.data, df_the_dict], ignore_index=True)
-        self.unoffered_products = self.unoffered_products.sort_values(
-            by=[self.product_column_name, self.customer_column_name])
+        Raises:
+            KeyError: functions fails if the customer is unknown
 
-        self.unoffered_products = self.unoffered_products.pivot_table(
-            index=self.customer_column_name, columns=self.product_column_name, aggfunc=any, fill_value="")
-        self.unoffered_products = self.unoffered_products.replace(True,  "X")
+        Returns:
+            list: contains the sorted names of the unoffered products
+        """
 
-    def calculate_seller_effectiveness(self, conf):
-        """Calculates every seller's overall and on a per customer basis effectiveness and saves the results in a 2D pandas Dataframe
+        if self.unoffered_matrix is None:
+            self.calculate_unoffered_products()
+        return self.unoffered_matrix.get_unoffered_products(customer)
 
-        Args:
-            conf (dict): contains the user configuration options
+    def calculate_product_recommendations(self):
+        """Ranks the unoffered products of every customer by their co-occurrence with the customer's accepted products and saves the conf["recommendations_per_customer"] best ones per customer in a long pandas Dataframe
         """
 
-        column_names = [self.seller_column_name] + \
-            conf["customers"]+[self.seller_effectiveness_column]
-        self.seller_effectiveness = pd.DataFrame(columns=column_names)
+        if self.aggregator is None:
+            self.calculate_counts()
+        if self.unoffered_matrix is None:
+            self.unoffered_matrix = ProductOfferMatrix(self.aggregator)
 
-        for seller_name, per_seller_data in self.data.groupby(self.seller_column_name):
-            # calculating the total effectiveness of a seller
+        self.product_recommendations = ProductRecommender(
+            self.aggregator, self.unoffered_matrix).rank(self.recommendations_per_customer)
+        self.calculated_reports.add("product_recommendations")
 
-            successfull_sales = per_seller_data[per_seller_data[self.status_column_name]
-                                                == self.status_accepted].shape[0]
-            total_sales = per_seller_data[self.status_column_name].notna(
-            ).sum()
-            effectiveness = (successfull_sales/total_sales) * \
-                100 if total_sales else 0
+    def calculate_seller_time_series(self):
+        """Calculates every seller's effectiveness and coverage per calendar week and over rolling windows of conf["rolling_window_days"] days and saves the results in a long pandas Dataframe
+           Requires the date column conf["date_column_name"]. With conf["seller_time_series_per_customer"] there is one row per window, seller and customer
 
-            # calculating the effectiveness of a seller per customer
-            per_customer_effectiveness_dict = {}
-            for customer_name, per_customer_data in per_seller_data.groupby(self.customer_column_name):
+        Raises:
+            ValueError: functions fails if no date column is configured
+        """
 
-                per_customer_successfull_sales = per_customer_data[per_customer_data[self.status_column_name]
-                                                                   == self.status_accepted].shape[0]
-                per_customer_total_sales = per_customer_data[self.status_column_name].notna(
-                ).sum()
-                per_customer_effectiveness = (
-                    per_customer_successfull_sales/per_customer_total_sales) * 100 if per_customer_total_sales else 0.0
+        if not self.date_column_name:
+            logging.error(
+                "The seller time series require a date_column_name in the [Column Names] section of the configuration file")
+            raise ValueError("No date_column_name is set")
+        if self.aggregator is None:
+            self.calculate_counts()
 
-                per_customer_effectiveness_dict[customer_name] = per_customer_effectiveness
+        self.seller_time_series = SellerTimeSeries(self.aggregator, self.seller_time_series_per_customer).to_frame(
+            self.rolling_window_days, self.seller_effectiveness_column, self.seller_coverage_column)
+        self.calculated_reports.add("seller_time_series")
 
-            per_seller_per_customer_data = []
-            for customer in conf["customers"]:
-                per_seller_per_customer_data.append(
-                    per_customer_effectiveness_dict.get(customer, 0))
+    def decode_seller_matrix(self, matrix):
+        """Maps the seller codes of the rows and the customer codes of the columns of a matrix back to their labels
 
-            self.seller_effectiveness.loc[len(self.seller_effectiveness)] = [
-                seller_name] + per_seller_per_customer_data + [effectiveness]
+        Args:
+            matrix (pd.DataFrame | pd.Series): indexed by seller codes and, for a DataFrame, with customer codes as columns
 
-        self.seller_effectiveness = self.seller_effectiveness.sort_values(
-            by=[self.seller_effectiveness_column, self.seller_column_name], ascending=False)
+        Returns:
+            pd.DataFrame | pd.Series: the matrix with labels, sorted by seller
+        """
 
-        self.round_up_numbers(self.seller_effectiveness)
+        matrix.index = self.aggregator.decode(
+            self.seller_column_name, matrix.index)
+        if isinstance(matrix, pd.DataFrame):
+            matrix.columns = self.aggregator.decode(
+                self.customer_column_name, matrix.columns)
+        return matrix.sort_index()
 
-    def calculate_seller_coverage(self, conf):
-        """Calculates every seller's overall and on a per customer basis coverage and saves the results in a 2D pandas Dataframe
+    def calculate_seller_effectiveness(self, conf):
+        """Calculates every seller's overall and on a per customer basis effectiveness and saves the results in a 2D pandas Dataframe
 
         Args:
             conf (dict): contains the user configuration options
         """
 
-        column_names = [self.seller_column_name] + \
-            conf["customers"]+[self.seller_coverage_column]
-        self.seller_offer_coverage = pd.DataFrame(columns=column_names)
-        total_offers = self.data[self.status_column_name].notna().sum()
+        if self.aggregator is None:
+            self.calculate_counts()
+        offer_counts = self.aggregator.offer_counts
+
+        seller_counts = offer_counts[offer_counts.index.get_level_values(
+            self.seller_column_name) >= 0]
+        accepted = seller_counts["accepted"].unstack(fill_value=0)
+        offers = seller_counts["offers"].unstack(fill_value=0)
+
+        # calculating the effectiveness of a seller per customer and in total from the margins
+        per_customer_effectiveness = (accepted/offers*100).fillna(0)
+        total_offers = offers.sum(axis=1)
+        effectiveness = (accepted.sum(axis=1)/total_offers *
+                         100).where(total_offers > 0, 0)
+
+        self.seller_effectiveness = self.decode_seller_matrix(per_customer_effectiveness).reindex(
+            columns=conf["customers"], fill_value=0)
+        self.seller_effectiveness.insert(
+            0, self.seller_column_name, self.seller_effectiveness.index)
+        self.seller_effectiveness[self.seller_effectiveness_column] = self.decode_seller_matrix(
+            effectiveness)
+        self.seller_effectiveness = self.seller_effectiveness.reset_index(
+            drop=True).rename_axis(columns=None)
 
-        for seller_name, per_seller_data in self.data.groupby(self.seller_column_name):
-            # calculate the offer coverage of a seller
+        self.seller_effectiveness = self.seller_effectiveness.sort_values(
+            by=[self.seller_effectiveness_column, self.seller_column_name], ascending=False)
 
-            seller_offers = per_seller_data[self.status_column_name].notna(
-            ).sum()
-            seller_total_coverage = (
-                seller_offers/total_offers)*100 if total_offers else 0
+        self.seller_effectiveness = self.round_up_numbers(
+            self.seller_effectiveness)
+        self.calculated_reports.add("seller_effectiveness")
 
-            # calculate the offer coverage of a seller per customer
-            per_customer_coverage_dict = {}
-            for customer_name, per_customer_data in self.data.groupby(self.customer_column_name):
-                per_customer_offers = per_customer_data[self.status_column_name].notna(
-                ).sum()
-                seller_offers = per_customer_data[per_customer_data[self.seller_column_name] == seller_name].notna(
-                ).shape[0]
-                per_customer_coverage = (
-                    seller_offers/per_customer_offers) * 100 if per_customer_offers else 0.0
-                per_customer_coverage_dict[customer_name] = per_customer_coverage
+    def calculate_seller_coverage(self, conf):
+        """Calculates every seller's overall and on a per customer basis coverage and saves the results in a 2D pandas Dataframe
 
-            per_seller_per_customer_data = []
-            for customer in conf["customers"]:
-                per_seller_per_customer_data.append(
-                    per_customer_coverage_dict.get(customer, 0))
+        Args:
+            conf (dict): contains the user configuration options
+        """
 
-            self.seller_offer_coverage.loc[len(self.seller_offer_coverage)] = [
-                seller_name] + per_seller_per_customer_data + [seller_total_coverage]
+        if self.aggregator is None:
+            self.calculate_counts()
+        offer_counts = self.aggregator.offer_counts
+
+        total_offers = offer_counts["offers"].sum()
+        per_customer_offers = offer_counts["offers"].groupby(
+            level=self.customer_column_name).sum()
+
+        seller_counts = offer_counts[offer_counts.index.get_level_values(
+            self.seller_column_name) >= 0]
+        seller_rows = seller_counts["rows"].unstack(fill_value=0)
+        seller_offers = seller_counts["offers"].groupby(
+            level=self.seller_column_name).sum()
+
+        # calculate the offer coverage of a seller per customer by broadcasting the per customer totals
+        per_customer_coverage = seller_rows.div(per_customer_offers.where(
+            per_customer_offers > 0), axis=1).mul(100).fillna(0)
+        seller_total_coverage = (seller_offers/total_offers) * \
+            100 if total_offers else seller_offers*0
+
+        self.seller_offer_coverage = self.decode_seller_matrix(per_customer_coverage).reindex(
+            columns=conf["customers"], fill_value=0)
+        self.seller_offer_coverage.insert(
+            0, self.seller_column_name, self.seller_offer_coverage.index)
+        self.seller_offer_coverage[self.seller_coverage_column] = self.decode_seller_matrix(
+            seller_total_coverage)
+        self.seller_offer_coverage = self.seller_offer_coverage.reset_index(
+            drop=True).rename_axis(columns=None)
 
         self.seller_offer_coverage = self.seller_offer_coverage.sort_values(
             by=[self.seller_coverage_column, self.seller_column_name], ascending=False)
 
-        self.round_up_numbers(self.seller_offer_coverage)
+        self.seller_offer_coverage = self.round_up_numbers(
+            self.seller_offer_coverage)
+        self.calculated_reports.add("seller_coverage")
 
-    def round_up_numbers(self, df):
+    def round_up_numbers(self, df) -> pd.DataFrame:
         """Rounds up the numbers and converts all cells to of a string type in a dataframe
+           All numeric columns are converted in one block instead of cell by cell
 
         Args:
             df (pd.DataFrame): any pandas Dataframe
+
+        Returns:
+            pd.DataFrame: the dataframe with the rounded numbers as strings and zeros as empty strings
         """
-        for column in df.columns:
-            try:
-                df[column] = df[column].astype(
-                    'float64')
-                df[column] = df[column].apply(
-                    lambda x: str(round(x)))
 
-            except ValueError:
+        numeric_positions = [position for position, dtype in enumerate(
+            df.dtypes) if pd.api.types.is_numeric_dtype(dtype)]
+        numbers = dict(zip(numeric_positions, df.iloc[:, numeric_positions].to_numpy(
+            dtype='float64').T))
+        for position in range(df.shape[1]):
+            if position in numbers:
+                continue
+            try:
+                numbers[position] = df.iloc[:, position].to_numpy(
+                    dtype='float64')
+            except (TypeError, ValueError):
                 pass
-        df.replace("0", "", inplace=True)
+
+        # columns with missing values are left as numbers, since they cannot be rounded to an integer
+        missing_positions = [position for position,
+                             column in numbers.items() if np.isnan(column).any()]
+        positions = sorted(
+            position for position in numbers if position not in missing_positions)
+
+        values = df.to_numpy(dtype=object, copy=True)
+        if positions:
+            values[:, positions] = np.rint(np.column_stack(
+                [numbers[position] for position in positions])).astype(np.int64).astype(str)
+        values[values == "0"] = ""
+
+        rounded_df = pd.DataFrame(values, index=df.index, columns=df.columns)
+        for position in missing_positions:
+            rounded_df.isetitem(position, numbers[position])
+        return rounded_df
 
     def create_results_folder(self):
         """Creates the path where the result of the execution is going to be saved
@@ -336,55 +2496,688 @@ class DataAnalyzer:
                 f"Permission Denied: Failed to create a folder in the specified output path{self.results_path}")
             os._exit(1)
 
+    @staticmethod
+    def export_table(df, path, output_format, hide_index) -> float:
+        """Exports a dataframe into a file of the given format, possibly in a worker process
+
+        Args:
+            df (pd.DataFrame): the dataframe to be exported
+            path (str): Filename of the exported file
+            output_format (str): one of DataAnalyzer.output_formats
+            hide_index (bool): leaves the index of the dataframe out of the exported file
+
+        Raises:
+            ValueError: functions fails if the output format is not supported
+
+        Returns:
+            float: seconds taken to export the dataframe
+        """
+
+        start = time.perf_counter()
+        if output_format == "png":
+            import dataframe_image as dfi
+
+            # fix: to prevent warning coming up because of using dfi.export with the switch table_conversion="matplotlib" on
+            warnings.filterwarnings("ignore", category=FutureWarning)
+            dfi.export(df.style.hide() if hide_index else df,
+                       path, table_conversion="matplotlib")
+        elif output_format == "csv":
+            df.to_csv(path, index=not hide_index)
+        elif output_format == "parquet":
+            df.to_parquet(path, index=not hide_index)
+        elif output_format == "html":
+            df.to_html(path, index=not hide_index)
+        else:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        return time.perf_counter() - start
+
     def save_results(self, df="all"):
-        """Saves the supplied dataframe(s) into pictures for user visibility
-           By default it exports as picture all of the dataframes. If a dataframe is supplied, then only this dataframe is exported as a picture
+        """Saves the supplied dataframe(s) into files of the configured output format for user visibility
+           By default it exports all of the dataframes that have been calculated. If a dataframe or a list of dataframes is supplied, then only these dataframes are exported
+           With more than one output worker the dataframes are exported concurrently in a process pool
 
         Args:
-            df (str | pd.DataFrame): If it's a DataFrame then it contains information potentially about sellers, customers and products. Defaults to "all".
+            df (str | pd.DataFrame | list): If it's a DataFrame then it contains information potentially about sellers, customers and products. Defaults to "all".
         """
 
+        if self.output_format not in self.output_formats:
+            logging.error(
+                f"Unsupported output format: {self.output_format}. Choose one of: {', '.join(self.output_formats)}")
+            os._exit(1)
+
         self.create_results_folder()
-        # fix: to prevent warning coming up because of using later dfi.export with the switch table_conversion="matplotlib" on
-        warnings.filterwarnings("ignore", category=FutureWarning)
-
-        if (f'{self.unoffered_products=}'.split('=')[0]) == "self.unoffered_products" or (type(df) == str and df == "all"):
-            self.unoffered_products.style.background_gradient(cmap='Blues')
-            dfi.export(self.unoffered_products, os.path.join(
-                self.results_path, self.unoferred_products_filename), table_conversion="matplotlib")
-
-        if (f'{self.seller_effectiveness=}'.split('=')[0]) == "self.seller_effectiveness" or (type(df) == str and df == "all"):
-            self.seller_effectiveness
-            self.seller_effectiveness.style.background_gradient(
-                cmap='Blues')
-            self.seller_effectiveness.style.hide(axis='index')
-            dfi.export(self.seller_effectiveness.style.hide(), os.path.join(
-                self.results_path, self.seller_effectiveness_filename), table_conversion="matplotlib")
-
-        if (f'{self.seller_offer_coverage=}'.split('=')[0]) == "self.seller_offer_coverage" or (type(df) == str and df == "all"):
-            self.seller_offer_coverage
-            self.seller_offer_coverage.style.background_gradient(
-                cmap='Blues')
-            self.seller_offer_coverage.style.hide(axis='index')
-            dfi.export(self.seller_offer_coverage.style.hide(), os.path.join(
-                self.results_path, self.seller_coverage_filename), table_conversion="matplotlib")
+
+        tables = {
+            "unoffered_products": (self.unoffered_products, self.unoferred_products_filename, False),
+            "seller_effectiveness": (self.seller_effectiveness, self.seller_effectiveness_filename, True),
+            "seller_coverage": (self.seller_offer_coverage, self.seller_coverage_filename, True),
+            "product_recommendations": (self.product_recommendations,
+                                        self.product_recommendations_filename, True),
+            "seller_time_series": (self.seller_time_series, self.seller_time_series_filename, True)
+        }
+        if isinstance(df, pd.DataFrame):
+            df = [df]
+        if isinstance(df, list):
+            tables = [table for table in tables.values() if any(
+                table[0] is selected for selected in df)]
+        else:
+            tables = [table for report, table in tables.items()
+                      if report in self.calculated_reports]
+        if self.unoffered_pairs_only and any(table[0] is self.unoffered_products for table in tables):
+            # the unoffered products are too many for a dense table, so they are saved as (customer, product) pairs
+            tables = [
+                table for table in tables if table[0] is not self.unoffered_products]
+            path = os.path.join(self.results_path, Path(
+                self.unoferred_products_filename).stem + "_Pairs.csv")
+            self.log_export(path, lambda: self.export_unoffered_pairs(path))
+
+        exports = [(table, os.path.join(self.results_path, Path(filename).with_suffix("." + self.output_format).name), hide_index)
+                   for table, filename, hide_index in tables]
+
+        if self.output_workers > 1 and len(exports) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.output_workers, len(exports))) as executor:
+                futures = {executor.submit(self.export_table, table, path, self.output_format, hide_index): path
+                           for table, path, hide_index in exports}
+                for future in as_completed(futures):
+                    self.log_export(futures[future], future.result)
+        else:
+            for table, path, hide_index in exports:
+                self.log_export(path, lambda: self.export_table(
+                    table, path, self.output_format, hide_index))
         logging.info(f"Output generated under: {self.results_path}")
 
+    def export_unoffered_pairs(self, path) -> float:
+        """Exports the unoffered (customer, product) pairs in long format into a .csv file
 
-if __name__ == '__main__':
+        Args:
+            path (str): Filename of the .csv file
+
+        Returns:
+            float: seconds taken to export the pairs
+        """
+
+        start = time.perf_counter()
+        self.unoffered_matrix.export_unoffered_pairs(path)
+        return time.perf_counter() - start
+
+    def log_export(self, path, export):
+        """Logs the time taken by an export or the error it raised
+
+        Args:
+            path (str): Filename of the exported file
+            export (Callable): returns the seconds taken by the export
+        """
+
+        try:
+            logging.info(f"Saved {path} in {export():.2f} s")
+        except Exception as e:
+            logging.error(f"An error occurred while saving {path}: {e}")
+
+
+class RunProfiler:
+    """Responsible for recording the wall time, CPU time, memory and data sizes of every stage of a run and writing them into a run report
+    """
+
+    report_filename = "run_report.json"
+    profile_filename = "run_profile.prof"
+
+    def __init__(self, enabled=False, trace_memory=False, cprofile=False):
+        """Constructor for the recording of a run
+
+        Args:
+            enabled (bool, optional): logs every stage and writes the run report. Defaults to False.
+            trace_memory (bool, optional): also records the peak memory traced by tracemalloc, which slows down the run. Defaults to False.
+            cprofile (bool, optional): also dumps a cProfile of the run next to the run report. Defaults to False.
+        """
+        self.enabled = False
+        self.trace_memory = False
+        self.profile = None
+        self.stages = []
+        self.started = datetime.now()
+        self.enable(enabled, trace_memory, cprofile)
+
+    def enable(self, enabled=False, trace_memory=False, cprofile=False):
+        """Switches on the recording options that are set, e.g. once the configuration file has been read
+
+        Args:
+            enabled (bool, optional): logs every stage and writes the run report. Defaults to False.
+            trace_memory (bool, optional): also records the peak memory traced by tracemalloc. Defaults to False.
+            cprofile (bool, optional): also dumps a cProfile of the run. Defaults to False.
+        """
+
+        self.enabled = self.enabled or enabled or trace_memory or cprofile
+        if trace_memory and not self.trace_memory:
+            self.trace_memory = True
+            tracemalloc.start()
+        if cprofile and self.profile is None:
+            import cProfile
+
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def get_peak_rss_mb(self):
+        """Returns the peak resident set size of the process so far
+
+        Returns:
+            float | None: peak resident set size in MB, None where the resource module is not available
+        """
+
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return round(peak_rss/2**20 if sys.platform == "darwin" else peak_rss/2**10, 3)
+
+    @contextmanager
+    def stage(self, name):
+        """Records a stage of the run
+
+        Args:
+            name (str): Name of the stage
+
+        Yields:
+            dict: receives additional details of the stage, such as row counts and group cardinalities
+        """
+
+        details = {}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield details
+        finally:
+            record = {"stage": name, "wall_seconds": round(time.perf_counter()-wall_start, 6),
+                      "cpu_seconds": round(time.process_time()-cpu_start, 6), "peak_rss_mb": self.get_peak_rss_mb()}
+            if self.trace_memory:
+                record["traced_peak_mb"] = round(
+                    tracemalloc.get_traced_memory()[1]/2**20, 3)
+            record.update(details)
+            self.stages.append(record)
+            if self.enabled:
+                logging.info(
+                    f"{name}: {record['wall_seconds']:.3f} s wall, {record['cpu_seconds']:.3f} s CPU")
+
+    def write_report(self, results_path, conf):
+        """Writes the run report, and the cProfile dump if enabled, into the results folder
+
+        Args:
+            results_path (str): the timestamped folder of the results
+            conf (dict): contains the user configuration options of the run
+        """
+
+        if not self.enabled:
+            return
+
+        report = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "input_file": conf.get("input_file"),
+            "settings": {key: conf[key] for key in ["chunksize", "encode_columns", "use_cache", "incremental",
+                                                    "output_format", "output_workers"] if key in conf},
+            "wall_seconds": round(sum(stage["wall_seconds"] for stage in self.stages), 6),
+            "cpu_seconds": round(sum(stage["cpu_seconds"] for stage in self.stages), 6),
+            "peak_rss_mb": self.get_peak_rss_mb(),
+            "stages": self.stages
+        }
+        with open(os.path.join(results_path, self.report_filename), "w", encoding='utf-8') as f:
+            json.dump(report, f, indent=4, default=str)
+
+        if self.trace_memory:
+            tracemalloc.stop()
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(os.path.join(
+                results_path, self.profile_filename))
+        logging.info(
+            f"Run report saved under: {os.path.join(results_path, self.report_filename)}")
+
+
+class SalesIndex:
+    """Responsible for answering queries about single sellers, customers and products from the count tables of a loaded input
+       The effectiveness and coverage of every (seller, customer) pair are calculated once and indexed by seller and by customer
+    """
+
+    def __init__(self, data_analyzer):
+        """Constructor for the indexes of an analyzer's count tables
+
+        Args:
+            data_analyzer (DataAnalyzer): contains the loaded sales
+        """
+
+        if data_analyzer.aggregator is None:
+            data_analyzer.calculate_counts()
+        aggregator = data_analyzer.aggregator
+        seller_column_name = data_analyzer.seller_column_name
+        customer_column_name = data_analyzer.customer_column_name
+        offer_counts = aggregator.offer_counts
+
+        seller_codes = offer_counts.index.get_level_values(
+            seller_column_name).to_numpy()
+        customer_codes = offer_counts.index.get_level_values(
+            customer_column_name).to_numpy()
+        customer_offers = offer_counts["offers"].groupby(
+            level=customer_column_name).sum()
+        total_offers = offer_counts["offers"].sum()
+
+        # the same margins as calculate_seller_effectiveness and calculate_seller_coverage, without the rounding
+        pairs = offer_counts[(seller_codes >= 0) & (customer_codes >= 0)]
+        offers = customer_offers.reindex(pairs.index.get_level_values(
+            customer_column_name)).to_numpy()
+        pairs = pairs.assign(effectiveness=(pairs["accepted"]/pairs["offers"]*100).fillna(0),
+                             coverage=np.nan_to_num(pairs["rows"].to_numpy()/np.where(offers > 0, offers, np.nan)*100))
+        pairs.index = pd.MultiIndex.from_arrays([
+            aggregator.decode(seller_column_name, pairs.index.get_level_values(
+                seller_column_name)).rename(seller_column_name),
+            aggregator.decode(customer_column_name, pairs.index.get_level_values(
+                customer_column_name)).rename(customer_column_name)])
+        self.seller_pairs = pairs.sort_index()
+        self.customer_pairs = pairs.swaplevel().sort_index()
+
+        sellers = offer_counts[seller_codes >= 0].groupby(
+            level=seller_column_name).sum()
+        sellers = sellers.assign(effectiveness=(sellers["accepted"]/sellers["offers"]*100).fillna(0),
+                                 coverage=sellers["offers"]/total_offers*100 if total_offers else 0.0)
+        sellers.index = aggregator.decode(seller_column_name, sellers.index)
+        self.sellers = sellers.sort_index()
+
+        self.unoffered_matrix = ProductOfferMatrix(aggregator)
+        self.cardinalities = data_analyzer.get_cardinalities()
+
+        self.labels = {"sellers": self.sellers.index, "customers": self.unoffered_matrix.customers,
+                       "products": self.unoffered_matrix.products}
+        # names in a URL are strings, so numeric labels are looked up by their string form
+        self.names = {kind: {str(label): label for label in labels}
+                      for kind, labels in self.labels.items()}
+
+    def get_label(self, kind, name):
+        """Returns the seller, customer or product label of a name given as a string
+
+        Args:
+            kind (str): one of "sellers", "customers" and "products"
+            name (str): the label as a string
+
+        Raises:
+            KeyError: functions fails if the name is unknown
+
+        Returns:
+            object: the label as it is kept in the count tables
+        """
+
+        return self.names[kind][name]
+
+    def get_seller(self, seller) -> dict:
+        """Returns the effectiveness and coverage of a seller in total and per customer
+
+        Args:
+            seller (str): Name of the seller
+
+        Raises:
+            KeyError: functions fails if the seller is unknown
+
+        Returns:
+            dict: contains the totals of the seller and the counts of every customer the seller has made offers to
+        """
+
+        totals = self.sellers.loc[seller]
+        return {"seller": seller, **self.get_counts(totals), "customers": self.get_pairs(self.seller_pairs, seller)}
+
+    def get_customer(self, customer) -> dict:
+        """Returns the effectiveness and coverage of every seller of a customer and the customer's unoffered products
+
+        Args:
+            customer (str): Name of the customer
+
+        Raises:
+            KeyError: functions fails if the customer is unknown
+
+        Returns:
+            dict: contains the counts of every seller that has made offers to the customer and the unoffered products
+        """
+
+        unoffered_products = self.unoffered_matrix.get_unoffered_products(
+            customer)
+        return {"customer": customer, "sellers": self.get_pairs(self.customer_pairs, customer),
+                "unoffered_products": unoffered_products}
+
+    def get_pairs(self, pairs, name) -> dict:
+        """Returns the counts of the pairs of a seller or a customer
+
+        Args:
+            pairs (pd.DataFrame): the pairs indexed by seller or by customer first
+            name (str): Name of the seller or customer
+
+        Returns:
+            dict: contains the counts for every name of the second level, empty if there are no pairs
+        """
+
+        try:
+            counts = pairs.loc[name]
+        except KeyError:
+            return {}
+        return dict(zip(counts.index, ({"accepted": accepted, "offers": offers, "rows": rows, "effectiveness": effectiveness, "coverage": coverage}
+                                       for accepted, offers, rows, effectiveness, coverage in zip(
+                                           *(counts[column].tolist() for column in ("accepted", "offers", "rows", "effectiveness", "coverage"))))))
+
+    def get_product(self, product) -> dict:
+        """Returns the customers to whom a product has not been offered yet
+
+        Args:
+            product (str): Name of the product
+
+        Raises:
+            KeyError: functions fails if the product is unknown
+
+        Returns:
+            dict: contains the customers to whom the product has not been offered
+        """
+
+        return {"product": product, "unoffered_customers": self.unoffered_matrix.get_unoffered_customers(product)}
+
+    def get_counts(self, counts) -> dict:
+        """Converts a row of counts into plain numbers for JSON
+
+        Args:
+            counts (pd.Series): contains the accepted, offers, rows, effectiveness and coverage of a seller or a pair
+
+        Returns:
+            dict: contains the counts as Python numbers
+        """
+
+        return {"accepted": int(counts["accepted"]), "offers": int(counts["offers"]), "rows": int(counts["rows"]),
+                "effectiveness": float(counts["effectiveness"]), "coverage": float(counts["coverage"])}
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Responsible for answering the HTTP GET requests of a query service with JSON
+       /sellers, /customers and /products list the names, /sellers/<name>, /customers/<name> and /products/<name> answer about one of them and /status describes the loaded input
+    """
+
+    def do_GET(self):
+        """Answers a GET request with JSON, 404 for unknown paths and names
+        """
+
+        index = self.server.service.index
+        parts = [unquote(part) for part in self.path.split("?")[
+            0].strip("/").split("/")]
+        queries = {"sellers": index.get_seller,
+                   "customers": index.get_customer, "products": index.get_product}
+
+        try:
+            if parts == ["status"]:
+                self.send_json(200, self.server.service.get_status())
+            elif len(parts) == 1 and parts[0] in index.labels:
+                self.send_json(200, list(index.labels[parts[0]]))
+            elif len(parts) == 2 and parts[0] in queries:
+                self.send_json(200, queries[parts[0]](
+                    index.get_label(parts[0], parts[1])))
+            else:
+                self.send_json(404, {"error": f"Unknown path: {self.path}"})
+        except KeyError:
+            self.send_json(
+                404, {"error": f"Unknown {parts[0].rstrip('s')}: {parts[1]}"})
+
+    def send_json(self, status, content):
+        """Sends a response with a JSON body
+
+        Args:
+            status (int): HTTP status code
+            content (dict | list): the body of the response
+        """
+
+        body = json.dumps(content, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class QueryService:
+    """Responsible for loading the input once and answering queries about it over local HTTP with JSON
+       The input is reloaded in the background when its files change, queries keep being answered from the previous index meanwhile
+    """
+
+    def __init__(self, conf, host="127.0.0.1", port=8765, reload_interval=5):
+        """Constructor for the query service, loads and indexes the input
+
+        Args:
+            conf (dict): contains user configuration options
+            host (str, optional): address the service listens on. Defaults to "127.0.0.1".
+            port (int, optional): port the service listens on, 0 picks a free port. Defaults to 8765.
+            reload_interval (float, optional): seconds between checks of the input files for changes, 0 never reloads. Defaults to 5.
+        """
+        self.conf = conf
+        self.reload_interval = reload_interval
+        self.signature = None
+        self.index = None
+        self.loaded = None
+        self.reload()
+
+        self.server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+        self.server.service = self
+        self.serving = False
+        self.stopped = threading.Event()
+
+    def get_signature(self) -> list:
+        """Returns the names, sizes and modification times of the input files, which change whenever an input file does
+
+        Returns:
+            list: contains the name, size and modification time of every input file
+        """
+
+        input_files = [self.conf["database_file"]] if self.conf.get("database_file") else DataLoader(
+            self.conf.get("input_file", "input_sales.csv")).get_input_files()
+        return [(input_file, os.stat(input_file).st_size, os.stat(input_file).st_mtime_ns)
+                for input_file in input_files if os.path.exists(input_file)]
+
+    def reload(self) -> bool:
+        """Loads and indexes the input again if its files have changed since it was last loaded
+           A failed reload keeps the previous index, only the first load raises
+
+        Raises:
+            Exception: functions fails if the input cannot be loaded the first time
+
+        Returns:
+            bool: True if the input has been loaded again
+        """
+
+        signature = self.get_signature()
+        if signature == self.signature:
+            return False
+
+        start = time.perf_counter()
+        try:
+            # the configuration is copied, since loading the input adds the customers to it
+            index = SalesIndex(DataAnalyzer(dict(self.conf)))
+        except Exception as e:
+            if self.index is None:
+                raise
+            # e.g. an input file caught while it is rewritten, the signature is kept so the next check tries again
+            logging.error(
+                f"Reloading the input failed, queries are answered from the previous input: {e}")
+            return False
+        self.index, self.signature, self.loaded = index, signature, datetime.now()
+        logging.info(
+            f"Loaded and indexed {index.cardinalities['rows']} rows in {time.perf_counter()-start:.3f} s")
+        return True
+
+    def get_status(self) -> dict:
+        """Returns a description of the loaded input
+
+        Returns:
+            dict: contains the input file, the time it was loaded and the row count and group cardinalities
+        """
+
+        return {"input_file": self.conf.get("input_file", "input_sales.csv"), "loaded": self.loaded.isoformat(timespec="seconds"),
+                **self.index.cardinalities}
+
+    def get_address(self) -> tuple:
+        """Returns the address the service listens on
+
+        Returns:
+            tuple: contains the host and the port
+        """
+
+        return self.server.server_address[:2]
+
+    def watch(self):
+        """Checks the input files for changes every reload_interval seconds until the service is stopped
+        """
+
+        while not self.stopped.wait(self.reload_interval):
+            self.reload()
+
+    def serve_forever(self):
+        """Answers queries, and watches the input files in a background thread, until the service is stopped
+        """
+
+        if self.reload_interval:
+            threading.Thread(target=self.watch, daemon=True).start()
+        host, port = self.get_address()
+        logging.info(f"Query service listening on http://{host}:{port}")
+        self.serving = True
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stops answering queries and watching the input files
+        """
+
+        self.stopped.set()
+        if self.serving:
+            self.server.shutdown()
+        self.server.server_close()
+
+
+def parse_arguments(argv=None):
+    """Parses the command line arguments
+
+    Args:
+        argv (list, optional): contains the command line arguments, those of the process by default. Defaults to None.
+
+    Returns:
+        argparse.Namespace: contains the parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Analyzes sales data and saves reports about unoffered products, seller effectiveness and seller coverage.")
+    parser.add_argument("-c", "--config", default="conf.ini",
+                        help="configuration file (default: %(default)s)")
+    parser.add_argument("-i", "--input",
+                        help="input .csv file, a directory of .csv files or a glob pattern, overrides input_file of the configuration file")
+    parser.add_argument("--results-path",
+                        help="folder the results are saved in, overrides results_path of the configuration file")
+    parser.add_argument("-o", "--output-format", choices=DataAnalyzer.output_formats,
+                        help="format of the saved reports, overrides output_format of the configuration file")
+    parser.add_argument("-r", "--reports", nargs="+", choices=REPORTS, default=list(DEFAULT_REPORTS), metavar="REPORT",
+                        help=f"reports to calculate and save, any of: {', '.join(REPORTS)} (default: {', '.join(DEFAULT_REPORTS)})")
+    parser.add_argument("--select-input", action="store_true",
+                        help="open a file dialog if the input file does not exist instead of failing")
+    parser.add_argument("--serve", action="store_true",
+                        help="load the input once and answer queries over local HTTP with JSON instead of saving the reports")
+    parser.add_argument("--port", type=int,
+                        help="port of the query service, overrides port of the configuration file")
+    parser.add_argument("--profile", action="store_true",
+                        help="log the wall time, CPU time and memory of every stage and save a run report with the results")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record the peak memory of every stage through tracemalloc, implies --profile")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="also save a cProfile dump of the run with the results, implies --profile")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the analysis from the command line
+
+    Args:
+        argv (list, optional): contains the command line arguments, those of the process by default. Defaults to None.
+    """
+
+    args = parse_arguments(argv)
 
     logging.basicConfig(format='[%(levelname)s] %(message)s',
                         level=logging.INFO)
     logging.info("Initiated ...")
+    profiler = RunProfiler(args.profile, args.trace_memory, args.cprofile)
+
+    with profiler.stage("ConfigurationManager.read_configuration"):
+        config_manager = ConfigurationManager(args.config)
+        conf = config_manager.read_configuration()
+    for key, value in [("input_file", args.input), ("results_path", args.results_path), ("output_format", args.output_format)]:
+        if value is not None:
+            conf[key] = value
+    conf["select_input"] = args.select_input
+    profiler.enable(conf.get("profile", False), conf.get(
+        "profile_trace_memory", False), conf.get("profile_cprofile", False))
+
+    if args.serve:
+        port = args.port if args.port is not None else conf.get(
+            "service_port", 8765)
+        try:
+            service = QueryService(conf, conf.get("service_host", "127.0.0.1"), port,
+                                   conf.get("service_reload_interval", 5))
+        except Exception:
+            # the error has been logged while loading the input
+            os._exit(1)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            service.stop()
+        return
 
-    config_manager = ConfigurationManager()
-    conf = config_manager.read_configuration()
-
-    data_analyzer = DataAnalyzer(conf)
+    with profiler.stage("DataLoader") as details:
+        try:
+            data_analyzer = DataAnalyzer(conf)
+        except Exception:
+            # the error has been logged while loading the input
+            os._exit(1)
+        details["mode"] = "read_data" if data_analyzer.aggregator is None else "aggregate_data"
+        details.update(data_analyzer.get_cardinalities())
+    if data_analyzer.aggregator is None:
+        with profiler.stage("DataAnalyzer.calculate_counts") as details:
+            data_analyzer.calculate_counts()
+            details.update(data_analyzer.get_cardinalities())
+
+    results = []
+    if "unoffered_products" in args.reports:
+        with profiler.stage("DataAnalyzer.calculate_unoffered_products") as details:
+            data_analyzer.calculate_unoffered_products()
+            details["output_shape"] = data_analyzer.unoffered_products.shape
+            details["unoffered_pairs"] = data_analyzer.unoffered_matrix.count_unoffered()
+        results.append(data_analyzer.unoffered_products)
+    if "seller_effectiveness" in args.reports:
+        with profiler.stage("DataAnalyzer.calculate_seller_effectiveness") as details:
+            data_analyzer.calculate_seller_effectiveness(conf)
+            details["output_shape"] = data_analyzer.seller_effectiveness.shape
+        results.append(data_analyzer.seller_effectiveness)
+    if "seller_coverage" in args.reports:
+        with profiler.stage("DataAnalyzer.calculate_seller_coverage") as details:
+            data_analyzer.calculate_seller_coverage(conf)
+            details["output_shape"] = data_analyzer.seller_offer_coverage.shape
+        results.append(data_analyzer.seller_offer_coverage)
+    if "product_recommendations" in args.reports:
+        with profiler.stage("DataAnalyzer.calculate_product_recommendations") as details:
+            data_analyzer.calculate_product_recommendations()
+            details["output_shape"] = data_analyzer.product_recommendations.shape
+        results.append(data_analyzer.product_recommendations)
+    if "seller_time_series" in args.reports:
+        with profiler.stage("DataAnalyzer.calculate_seller_time_series") as details:
+            try:
+                data_analyzer.calculate_seller_time_series()
+            except ValueError:
+                # the missing date column has been logged
+                os._exit(1)
+            details["output_shape"] = data_analyzer.seller_time_series.shape
+        results.append(data_analyzer.seller_time_series)
+    with profiler.stage("DataAnalyzer.save_results"):
+        data_analyzer.save_results(results)
+
+    profiler.write_report(data_analyzer.results_path, conf)
+    logging.info("Completed successfully.")
 
-    data_analyzer.calculate_unoffered_products()
-    data_analyzer.calculate_seller_effectiveness(conf)
-    data_analyzer.calculate_seller_coverage(conf)
-    data_analyzer.save_results()
 
-    logging.info("Completed successfully.")
+if __name__ == '__main__':
+    main()
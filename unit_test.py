@@ -1,6 +1,22 @@
+import bz2
+import glob
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+import unittest.mock
+import urllib.error
+import urllib.request
+from contextlib import closing
+from urllib.parse import quote
 import pandas as pd
-from sales_data_analyzer import ConfigurationManager, DataLoader, DataAnalyzer
+from sales_data_analyzer import CompressedReader, ConfigurationManager, DataCache, DataLoader, DataAnalyzer, QueryService, RunProfiler, main
 
 
 class TestAnalyzer(unittest.TestCase):
@@ -66,6 +82,649 @@ class TestAnalyzer(unittest.TestCase):
         self.assertIsInstance(seller_coverage, pd.DataFrame)
         self.assertFalse(seller_coverage.empty)
 
+    def test_data_analyzer_calculate_seller_coverage_regression(self) -> None:
+        """Tests if calculate_seller_coverage function of DataAnalyzer reproduces the previously generated seller coverage of input_sales.csv."""
+        columns = ["verkäufer", "Billa", "DM", "Etsan", "Hofer", "Lidl",
+                   "Merkur", "Müller", "Penny", "REWE", "Total Coverage (%)"]
+        expected = pd.DataFrame([
+            ["Maria", "25", "17", "", "100", "", "", "", "50", "", "22"],
+            ["Florian", "", "", "", "", "", "50", "100", "", "71", "20"],
+            ["Emma", "38", "", "100", "", "", "50", "", "", "", "20"],
+            ["Felix", "", "", "", "", "100", "", "", "50", "", "18"],
+            ["Katharina", "38", "17", "", "", "", "", "", "", "29", "12"],
+            ["David", "", "67", "", "", "", "", "", "", "", "8"]
+        ], columns=columns, index=[5, 3, 1, 2, 4, 0])
+
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+        pd.testing.assert_frame_equal(
+            self.data_analyzer.seller_offer_coverage, expected)
+
+    def test_data_analyzer_chunked_reading(self) -> None:
+        """Tests if reading the input file in chunks generates the same results as reading it at once."""
+        chunked_conf = dict(self.conf, chunksize=7)
+        chunked_data_analyzer = DataAnalyzer(
+            chunked_conf, self.conf["input_file"], self.conf["results_path"])
+        self.assertIsNone(chunked_data_analyzer.data)
+
+        for data_analyzer, conf in [(self.data_analyzer, self.conf), (chunked_data_analyzer, chunked_conf)]:
+            data_analyzer.calculate_unoffered_products()
+            data_analyzer.calculate_seller_effectiveness(conf)
+            data_analyzer.calculate_seller_coverage(conf)
+
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.unoffered_products, self.data_analyzer.unoffered_products)
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.seller_offer_coverage, self.data_analyzer.seller_offer_coverage)
+
+    def test_data_loader_encode_columns(self) -> None:
+        """Tests if read_data function of DataLoader encodes the required columns as categoricals and DataAnalyzer still generates the same results."""
+        encoded_conf = dict(self.conf, encode_columns=True)
+        data: pd.DataFrame = self.data_loader.read_data(encoded_conf)
+        for column in ["kunde", "verkäufer", "produkt", "status"]:
+            self.assertIsInstance(data[column].dtype, pd.CategoricalDtype)
+
+        encoded_data_analyzer = DataAnalyzer(
+            encoded_conf, self.conf["input_file"], self.conf["results_path"])
+        encoded_data_analyzer.calculate_seller_effectiveness(encoded_conf)
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+        pd.testing.assert_frame_equal(
+            encoded_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+
+        # the memory is also reported when the columns are read as categoricals in chunks
+        with self.assertLogs(level="INFO") as logs:
+            DataLoader(self.conf["input_file"]).aggregate_data(
+                dict(encoded_conf, chunksize=7))
+        self.assertTrue(any(f"Encoded {len(data)} rows: memory used" in message
+                        for message in logs.output))
+
+    def test_data_analyzer_numeric_labels(self) -> None:
+        """Tests if numeric customer and product columns are kept as numbers and generate the same results read at once and in encoded chunks."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        data["kunde"] = pd.factorize(data["kunde"])[0] + 1001
+        data["produkt"] = pd.factorize(data["produkt"])[0] + 1
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            data.to_csv(input_file, index=False)
+
+            data_analyzers = []
+            for numeric_conf in [dict(self.conf, input_file=input_file),
+                                 dict(self.conf, input_file=input_file, chunksize=7, encode_columns=True)]:
+                data_analyzer = DataAnalyzer(numeric_conf, input_file)
+                data_analyzer.calculate_unoffered_products()
+                data_analyzer.calculate_seller_effectiveness(numeric_conf)
+                data_analyzer.calculate_seller_coverage(numeric_conf)
+                data_analyzers.append(data_analyzer)
+
+        numeric_data_analyzer, chunked_data_analyzer = data_analyzers
+        self.assertTrue(all(isinstance(customer, int)
+                        for customer in numeric_data_analyzer.unoffered_products.index))
+        self.assertIn(1001, numeric_data_analyzer.seller_offer_coverage.columns)
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.unoffered_products, numeric_data_analyzer.unoffered_products)
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.seller_effectiveness, numeric_data_analyzer.seller_effectiveness)
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.seller_offer_coverage, numeric_data_analyzer.seller_offer_coverage)
+
+    def test_data_analyzer_mixed_labels(self) -> None:
+        """Tests if a customer column whose first chunk is numeric and a later one is not generates the same results read at once and in chunks."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf).head(7).copy()
+        data["kunde"] = [1001] * 5 + ["A1", 1001]
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            data.to_csv(input_file, index=False)
+
+            data_analyzers = []
+            for mixed_conf in [dict(self.conf, input_file=input_file),
+                               dict(self.conf, input_file=input_file, chunksize=5)]:
+                data_analyzer = DataAnalyzer(mixed_conf, input_file)
+                data_analyzer.calculate_unoffered_products()
+                data_analyzers.append(data_analyzer)
+
+        data_analyzer, chunked_data_analyzer = data_analyzers
+        self.assertEqual(chunked_data_analyzer.aggregator.get_customers(), ["1001", "A1"])
+        pd.testing.assert_frame_equal(
+            chunked_data_analyzer.unoffered_products, data_analyzer.unoffered_products)
+
+    def test_data_loader_read_data_from_cache(self) -> None:
+        """Tests if read_data function of DataLoader returns the same DataFrame from the cache and if changing the input file invalidates the cache entry."""
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            shutil.copy(self.conf["input_file"], input_file)
+            cached_conf = dict(self.conf, input_file=input_file, use_cache=True,
+                               cache_path=os.path.join(temporary_path, "cache"))
+
+            data: pd.DataFrame = DataLoader(input_file).read_data(cached_conf)
+            cache = DataCache(input_file, cached_conf["cache_path"])
+            self.assertTrue(cache.contains())
+            pd.testing.assert_frame_equal(
+                DataLoader(input_file).read_data(cached_conf), data)
+
+            with open(input_file, "a", encoding="utf-8") as f:
+                f.write("\nDM,David,Kiwis,verkauft")
+            self.assertFalse(
+                DataCache(input_file, cached_conf["cache_path"]).contains())
+            self.assertEqual(
+                len(DataLoader(input_file).read_data(cached_conf)), len(data)+1)
+            self.assertEqual(
+                os.listdir(cached_conf["cache_path"]), [os.path.basename(DataCache(input_file, cached_conf["cache_path"]).entry_path)])
+
+    def test_data_analyzer_incremental(self) -> None:
+        """Tests if an incremental run over rows appended to the input file generates the same results as a full run."""
+        with open(self.conf["input_file"], encoding="utf-8") as f:
+            lines = f.read().splitlines(keepends=True)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            incremental_conf = dict(self.conf, input_file=input_file, incremental=True,
+                                    state_path=os.path.join(temporary_path, "state"))
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.writelines(lines[:30])
+            DataAnalyzer(dict(incremental_conf), input_file)
+            with open(input_file, "a", encoding="utf-8") as f:
+                f.writelines(lines[30:])
+
+            incremental_data_analyzer = DataAnalyzer(
+                incremental_conf, input_file)
+            incremental_data_analyzer.calculate_seller_coverage(
+                incremental_conf)
+
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+        pd.testing.assert_frame_equal(
+            incremental_data_analyzer.seller_offer_coverage, self.data_analyzer.seller_offer_coverage)
+
+    def test_data_analyzer_incremental_partial_line(self) -> None:
+        """Tests if an incremental run that catches the last line while it is written, and one after a change in the middle of the input file, generate the same results as a full run."""
+        with open(self.conf["input_file"], encoding="utf-8") as f:
+            content = f.read()
+        # in the middle of the 31st line
+        cut = sum(map(len, content.splitlines(keepends=True)[:30])) + 5
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            incremental_conf = dict(self.conf, input_file=input_file, incremental=True,
+                                    state_path=os.path.join(temporary_path, "state"))
+
+            def count_rows():
+                data_analyzer = DataAnalyzer(
+                    dict(incremental_conf), input_file)
+                return int(data_analyzer.aggregator.offer_counts["rows"].sum())
+
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(content[:cut])
+            self.assertEqual(count_rows(), 30)
+            with open(input_file, "a", encoding="utf-8") as f:
+                f.write(content[cut:])
+            self.assertEqual(count_rows(), len(self.data_loader.read_data(self.conf)))
+
+            # the same size, but another seller in the middle of a larger already processed part
+            header, rows = content.split("\n", 1)
+            content = header + "\n" + (rows.rstrip("\n") + "\n")*100
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(content)
+            count_rows()
+            middle = content.index(",Emma,", len(content)//2)
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(content[:middle] + ",Anna," + content[middle+6:])
+            with self.assertLogs(level="WARNING"):
+                data_analyzer = DataAnalyzer(
+                    dict(incremental_conf), input_file)
+            self.assertIn("Anna", data_analyzer.aggregator.decode(
+                "verkäufer", data_analyzer.aggregator.offer_counts.index.get_level_values(0)))
+
+    def test_data_analyzer_incremental_concurrent_append(self) -> None:
+        """Tests if rows appended while a first incremental run reads the input file are counted once, by the next run."""
+        with open(self.conf["input_file"], encoding="utf-8") as f:
+            content = f.read().rstrip("\n") + "\n"
+        header, rows = content.split("\n", 1)
+        appended_rows = rows.splitlines(keepends=True)[:3]
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            incremental_conf = dict(self.conf, input_file=input_file, incremental=True, chunksize=4,
+                                    state_path=os.path.join(temporary_path, "state"))
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(content)
+
+            get_complete_size = DataLoader.get_complete_size
+
+            def append_while_reading(data_loader, size):
+                complete_size = get_complete_size(data_loader, size)
+                with open(input_file, "a", encoding="utf-8") as f:
+                    f.writelines(appended_rows)
+                return complete_size
+
+            with unittest.mock.patch.object(DataLoader, "get_complete_size", append_while_reading):
+                data_analyzer = DataAnalyzer(
+                    dict(incremental_conf), input_file)
+            self.assertEqual(int(data_analyzer.aggregator.offer_counts["rows"].sum()),
+                             len(rows.splitlines()))
+
+            data_analyzer = DataAnalyzer(dict(incremental_conf), input_file)
+            self.assertEqual(int(data_analyzer.aggregator.offer_counts["rows"].sum()),
+                             len(rows.splitlines()) + len(appended_rows))
+
+    def test_data_analyzer_save_results(self) -> None:
+        """Tests if save_results exports only the selected dataframes, or by default the calculated ones, as .csv files through two output workers and logs a file that fails without losing the others."""
+        with tempfile.TemporaryDirectory() as temporary_path:
+            csv_conf = dict(self.conf, results_path=temporary_path,
+                            output_format="csv", output_workers=2)
+            data_analyzer = DataAnalyzer(
+                csv_conf, self.conf["input_file"], temporary_path)
+            data_analyzer.calculate_unoffered_products()
+            data_analyzer.calculate_seller_effectiveness(csv_conf)
+            data_analyzer.calculate_seller_coverage(csv_conf)
+            # a dataframe that cannot be sent to a worker process
+            data_analyzer.product_recommendations = pd.DataFrame(
+                {"kunde": [lambda: None]})
+
+            with self.assertLogs(level="INFO") as logs:
+                data_analyzer.save_results([data_analyzer.seller_effectiveness, data_analyzer.seller_offer_coverage,
+                                            data_analyzer.product_recommendations])
+
+            self.assertEqual(sorted(os.listdir(data_analyzer.results_path)), [
+                             "Seller Coverage.csv", "Seller Effectiveness.csv"])
+            for table, filename in [(data_analyzer.seller_effectiveness, "Seller Effectiveness.csv"),
+                                    (data_analyzer.seller_offer_coverage, "Seller Coverage.csv")]:
+                pd.testing.assert_frame_equal(pd.read_csv(os.path.join(data_analyzer.results_path, filename), dtype=str, keep_default_na=False),
+                                              table.astype(str).reset_index(drop=True), check_column_type=False)
+            self.assertTrue(any(message.startswith("ERROR") and "Product_Recommendations.csv" in message
+                                for message in logs.output))
+
+            # by default only the calculated dataframes are exported, not the assigned recommendations or the time series
+            data_analyzer.save_results()
+            self.assertEqual(sorted(os.listdir(data_analyzer.results_path)), [
+                             "Seller Coverage.csv", "Seller Effectiveness.csv", "Unoffered Products.csv"])
+
+    def test_main_command_line(self) -> None:
+        """Tests if the command line overrides the input file and output format, saves only the selected reports, fails with exit code 1 on a missing input file and imports no GUI or image libraries."""
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "sales.csv")
+            shutil.copy(self.conf["input_file"], input_file)
+            main(["--input", input_file, "--results-path", temporary_path, "--output-format", "csv",
+                  "--reports", "seller_effectiveness", "seller_coverage"])
+
+            results_path, = [os.path.join(temporary_path, name) for name in os.listdir(
+                temporary_path) if name.startswith("Analysis_Results_")]
+            self.assertEqual(sorted(os.listdir(results_path)), [
+                             "Seller_Coverage.csv", "Seller_Effectiveness.csv"])
+
+            missing_input = subprocess.run([sys.executable, "sales_data_analyzer.py", "--input", os.path.join(temporary_path, "missing.csv"),
+                                            "--results-path", temporary_path], capture_output=True, text=True)
+            self.assertEqual(missing_input.returncode, 1)
+            self.assertIn("Input file not found", missing_input.stderr)
+
+        imports = subprocess.run([sys.executable, "-c", "import sys, sales_data_analyzer; print(sorted({'tkinter', 'dataframe_image'} & set(sys.modules)))"],
+                                 capture_output=True, text=True, check=True)
+        self.assertEqual(imports.stdout.strip(), "[]")
+
+    def test_run_profiler_write_report(self) -> None:
+        """Tests if RunProfiler records every stage with its details and writes them into a run report."""
+        run_profiler = RunProfiler(enabled=True, trace_memory=True)
+        with run_profiler.stage("DataAnalyzer.calculate_counts") as details:
+            self.data_analyzer.calculate_counts()
+            details.update(self.data_analyzer.get_cardinalities())
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            run_profiler.write_report(temporary_path, self.conf)
+            with open(os.path.join(temporary_path, RunProfiler.report_filename), encoding="utf-8") as f:
+                report = json.load(f)
+
+        self.assertEqual(len(report["stages"]), 1)
+        stage = report["stages"][0]
+        self.assertEqual(stage["stage"], "DataAnalyzer.calculate_counts")
+        self.assertEqual(stage["rows"], 50)
+        self.assertEqual(stage["sellers"], 6)
+        for key in ["wall_seconds", "cpu_seconds", "traced_peak_mb"]:
+            self.assertGreaterEqual(stage[key], 0)
+
+    def test_data_analyzer_partitioned_input(self) -> None:
+        """Tests if a directory and a glob pattern of several input files generate the same results as the single input file, also if their names contain glob characters."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        self.data_analyzer.calculate_unoffered_products()
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            partition_path = os.path.join(temporary_path, "sales [q1]")
+            os.mkdir(partition_path)
+            for i, start in enumerate(range(0, len(data), 20)):
+                data.iloc[start:start+20].to_csv(os.path.join(
+                    partition_path, f"input_sales_{i}.csv"), index=False)
+            single_input_file = os.path.join(temporary_path, "sales [q1].csv")
+            shutil.copy(self.conf["input_file"], single_input_file)
+            self.assertFalse(DataLoader(single_input_file).is_partitioned())
+
+            for input_file, input_workers in [(partition_path, 2), (os.path.join(glob.escape(partition_path), "input_sales_*.csv"), 1),
+                                              (single_input_file, 1)]:
+                partitioned_conf = dict(
+                    self.conf, input_file=input_file, input_workers=input_workers)
+                partitioned_data_analyzer = DataAnalyzer(
+                    partitioned_conf, input_file)
+                partitioned_data_analyzer.calculate_unoffered_products()
+                partitioned_data_analyzer.calculate_seller_effectiveness(
+                    partitioned_conf)
+
+                pd.testing.assert_frame_equal(
+                    partitioned_data_analyzer.unoffered_products, self.data_analyzer.unoffered_products)
+                pd.testing.assert_frame_equal(
+                    partitioned_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+
+    def test_data_analyzer_partitioned_input_cache(self) -> None:
+        """Tests if several input workers fill the cache without removing each other's entries while they are written, and reuse them in the next run."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_path = os.path.join(temporary_path, "input")
+            cache_path = os.path.join(temporary_path, "cache")
+            os.makedirs(input_path)
+            for i, start in enumerate(range(0, len(data), 13)):
+                data.iloc[start:start+13].to_csv(os.path.join(
+                    input_path, f"input_sales_{i}.csv"), index=False)
+            # an entry another process is still writing
+            os.makedirs(os.path.join(cache_path, "other.tmp"))
+
+            cached_conf = dict(self.conf, input_file=input_path,
+                               input_workers=4, use_cache=True, cache_path=cache_path)
+            for _ in range(2):
+                cached_data_analyzer = DataAnalyzer(
+                    dict(cached_conf), input_path)
+                cached_data_analyzer.calculate_seller_effectiveness(
+                    cached_conf)
+                pd.testing.assert_frame_equal(
+                    cached_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+            self.assertEqual(len(os.listdir(cache_path)), 5)
+            self.assertIn("other.tmp", os.listdir(cache_path))
+
+    def test_data_analyzer_unoffered_product_pairs(self) -> None:
+        """Tests if the sparse matrix answers the same unoffered products as the dense table and saves them as pairs above the dense limit."""
+        self.data_analyzer.calculate_unoffered_products()
+        unoffered_products = self.data_analyzer.unoffered_products
+        for customer in unoffered_products.index:
+            self.assertEqual(self.data_analyzer.get_unoffered_products(customer),
+                             list(unoffered_products.columns[unoffered_products.loc[customer] == "X"]))
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            sparse_conf = dict(self.conf, dense_unoffered_limit=0,
+                               output_format="csv", results_path=temporary_path)
+            sparse_data_analyzer = DataAnalyzer(
+                sparse_conf, self.conf["input_file"], temporary_path)
+            sparse_data_analyzer.calculate_unoffered_products()
+            self.assertTrue(sparse_data_analyzer.unoffered_products.empty)
+            sparse_data_analyzer.save_results(
+                sparse_data_analyzer.unoffered_products)
+
+            pairs = pd.read_csv(os.path.join(
+                sparse_data_analyzer.results_path, "Unoffered Products_Pairs.csv"))
+        expected_pairs = unoffered_products.stack()
+        expected_pairs = expected_pairs[expected_pairs == "X"].index.to_frame(
+            index=False)
+        pd.testing.assert_frame_equal(pairs, expected_pairs)
+
+        # every product offered to every customer gives an empty dense table, not pairs
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            pd.DataFrame({"kunde": ["DM", "DM", "Rewe", "Rewe"], "verkäufer": "Emma", "produkt": ["Feigen", "Kiwis"]*2,
+                          "status": "verkauft"}).to_csv(input_file, index=False)
+            offered_conf = dict(self.conf, input_file=input_file,
+                                output_format="csv", results_path=temporary_path)
+            offered_data_analyzer = DataAnalyzer(
+                offered_conf, input_file, temporary_path)
+            offered_data_analyzer.calculate_unoffered_products()
+            offered_data_analyzer.save_results(
+                offered_data_analyzer.unoffered_products)
+            self.assertEqual(os.listdir(offered_data_analyzer.results_path), [
+                             "Unoffered Products.csv"])
+
+    def test_data_analyzer_calculate_product_recommendations(self) -> None:
+        """Tests if the unoffered products are ranked by how many customers have accepted them together with each of the customer's accepted products."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        customer, product = self.conf["customer_column_name"], self.conf["product_column_name"]
+        accepted = data[data[self.conf["status_column_name"]] ==
+                        self.conf["status_accepted"]][[customer, product]].drop_duplicates()
+        cooccurrences = accepted.merge(accepted, on=customer)
+        cooccurrences = cooccurrences[cooccurrences[product+"_x"] != cooccurrences[product+"_y"]].groupby(
+            [product+"_x", product+"_y"]).size().rename("Score").reset_index()
+        expected = accepted.merge(cooccurrences, left_on=product, right_on=product+"_x").groupby(
+            [customer, product+"_y"])["Score"].sum().reset_index().rename(columns={product+"_y": product})
+        offered = data[[customer, product]].drop_duplicates()
+        expected = expected[~expected.set_index([customer, product]).index.isin(
+            offered.set_index([customer, product]).index)]
+        expected = expected.sort_values([customer, "Score", product], ascending=[
+                                        True, False, True]).groupby(customer).head(2)
+        expected.insert(1, "Rank", expected.groupby(customer).cumcount()+1)
+
+        self.data_analyzer.recommendations_per_customer = 2
+        self.data_analyzer.calculate_product_recommendations()
+        pd.testing.assert_frame_equal(self.data_analyzer.product_recommendations,
+                                      expected[[customer, "Rank", product, "Score"]].reset_index(drop=True), check_dtype=False)
+
+    def test_data_analyzer_calculate_seller_time_series(self) -> None:
+        """Tests if the weekly windows add up to the total offers, a rolling window over all days equals the total effectiveness and coverage, also per customer, and a missing date column raises a ValueError."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        data["datum"] = pd.date_range(
+            "2024-03-01", periods=len(data), freq="2D").strftime("%Y-%m-%d")
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            data.to_csv(input_file, index=False)
+            dated_conf = dict(self.conf, input_file=input_file, date_column_name="datum",
+                              rolling_window_days=[2*len(data)], chunksize=15)
+            dated_data_analyzer = DataAnalyzer(dated_conf, input_file)
+            dated_data_analyzer.calculate_seller_time_series()
+        time_series = dated_data_analyzer.seller_time_series
+        seller = self.conf["seller_column_name"]
+
+        weeks = time_series[time_series["Window"] == "Week"]
+        self.assertTrue(((weeks["End"] - weeks["Start"]).dt.days == 6).all())
+        pd.testing.assert_series_equal(weeks.groupby(seller)["Offers"].sum(), data.dropna(
+            subset=[self.conf["status_column_name"]]).groupby(seller).size(), check_names=False)
+
+        rolling = time_series[time_series["Window"] != "Week"]
+        totals = rolling[rolling["End"] ==
+                         rolling["End"].max()].set_index(seller)
+        for table, column in [(self.data_analyzer.seller_effectiveness, self.conf["seller_effectiveness_column"]),
+                              (self.data_analyzer.seller_offer_coverage, self.conf["seller_coverage_column"])]:
+            for _, row in table.iterrows():
+                self.assertEqual(
+                    str(round(totals.loc[row[seller], column])), row[column] or "0")
+
+        # per (seller, customer) pair the same window equals the effectiveness and coverage per customer
+        dated_data_analyzer.seller_time_series_per_customer = True
+        dated_data_analyzer.calculate_seller_time_series()
+        time_series = dated_data_analyzer.seller_time_series
+        rolling = time_series[time_series["Window"] != "Week"]
+        totals = rolling[rolling["End"] == rolling["End"].max()].set_index(
+            [seller, self.conf["customer_column_name"]])
+        for table, column in [(self.data_analyzer.seller_effectiveness, self.conf["seller_effectiveness_column"]),
+                              (self.data_analyzer.seller_offer_coverage, self.conf["seller_coverage_column"])]:
+            for _, row in table.iterrows():
+                for customer in self.conf["customers"]:
+                    self.assertEqual(str(round(totals[column].get((row[seller], customer), 0))),
+                                     row[customer] or "0")
+
+        dated_data_analyzer.date_column_name = None
+        with self.assertLogs(level="ERROR"), self.assertRaises(ValueError):
+            dated_data_analyzer.calculate_seller_time_series()
+
+    def test_data_analyzer_database_input(self) -> None:
+        """Tests if counting the sales in a SQLite database generates the same results as reading them from the input file."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        self.data_analyzer.calculate_unoffered_products()
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            database_file = os.path.join(temporary_path, "sales.db")
+            with closing(sqlite3.connect(database_file)) as connection:
+                data.to_sql("verkäufe", connection, index=False)
+
+            database_conf = dict(
+                self.conf, database_file=database_file, database_table="verkäufe")
+            database_data_analyzer = DataAnalyzer(
+                database_conf, self.conf["input_file"])
+            database_data_analyzer.calculate_unoffered_products()
+            database_data_analyzer.calculate_seller_effectiveness(
+                database_conf)
+            database_data_analyzer.calculate_seller_coverage(database_conf)
+
+        self.assertIsNone(database_data_analyzer.data)
+        pd.testing.assert_frame_equal(
+            database_data_analyzer.unoffered_products, self.data_analyzer.unoffered_products)
+        pd.testing.assert_frame_equal(
+            database_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+        pd.testing.assert_frame_equal(
+            database_data_analyzer.seller_offer_coverage, self.data_analyzer.seller_offer_coverage)
+
+    def test_data_analyzer_compressed_input(self) -> None:
+        """Tests if gzip and bz2 compressed input files generate the same results as the input file, with one and with several parse workers, and if the reader thread ends when the chunks are no longer read."""
+        self.data_loader.read_data(self.conf)
+        self.data_analyzer.calculate_unoffered_products()
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+
+        with open(self.conf["input_file"], "rb") as f:
+            content = f.read()
+        with tempfile.TemporaryDirectory() as temporary_path:
+            for extension, compression in [(".gz", gzip), (".bz2", bz2)]:
+                input_file = os.path.join(
+                    temporary_path, f"input_sales.csv{extension}")
+                with compression.open(input_file, "wb") as f:
+                    f.write(content)
+
+                for parse_workers in [1, 2]:
+                    compressed_conf = dict(
+                        self.conf, input_file=input_file, parse_workers=parse_workers)
+                    compressed_data_analyzer = DataAnalyzer(
+                        compressed_conf, input_file)
+                    compressed_data_analyzer.calculate_unoffered_products()
+                    compressed_data_analyzer.calculate_seller_effectiveness(
+                        compressed_conf)
+                    compressed_data_analyzer.calculate_seller_coverage(
+                        compressed_conf)
+
+                    pd.testing.assert_frame_equal(
+                        compressed_data_analyzer.unoffered_products, self.data_analyzer.unoffered_products)
+                    pd.testing.assert_frame_equal(
+                        compressed_data_analyzer.seller_effectiveness, self.data_analyzer.seller_effectiveness)
+                    pd.testing.assert_frame_equal(
+                        compressed_data_analyzer.seller_offer_coverage, self.data_analyzer.seller_offer_coverage)
+
+            # small blocks are parsed by both workers and still handed on in the order of the input file
+            reader = CompressedReader(input_file, workers=2, block_size=256)
+            data = pd.concat(reader.iter_chunks(
+                ["kunde", "verkäufer"]), ignore_index=True)
+            expected = pd.read_csv(
+                self.conf["input_file"], usecols=["kunde", "verkäufer"])
+            pd.testing.assert_frame_equal(
+                data.astype(str), expected.astype(str))
+            self.assertEqual(
+                reader.throughput["decompressed_mb"], round(len(content)/2**20, 3))
+
+            # stopping after the first chunk or a failed parse ends the reader thread, which waits on the full queue of small blocks
+            reader = CompressedReader(input_file, workers=1, block_size=64)
+            chunks = reader.iter_chunks(["kunde", "verkäufer"])
+            next(chunks)
+            chunks.close()
+            self.assertFalse(reader.reader.is_alive())
+            with unittest.mock.patch.object(CompressedReader, "parse_block", side_effect=ValueError("parse error")):
+                with self.assertRaises(ValueError):
+                    list(reader.iter_chunks(["kunde", "verkäufer"]))
+            self.assertFalse(reader.reader.is_alive())
+
+    def test_query_service(self) -> None:
+        """Tests if the query service answers the same effectiveness, coverage and unoffered products as the reports and reloads a changed input file."""
+        self.data_analyzer.calculate_unoffered_products()
+        self.data_analyzer.calculate_seller_effectiveness(self.conf)
+        self.data_analyzer.calculate_seller_coverage(self.conf)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            shutil.copy(self.conf["input_file"], input_file)
+            service = QueryService(
+                dict(self.conf, input_file=input_file), port=0, reload_interval=0)
+            threading.Thread(target=service.serve_forever, daemon=True).start()
+            host, port = service.get_address()
+
+            def query(path):
+                try:
+                    with urllib.request.urlopen(f"http://{host}:{port}{quote(path)}") as response:
+                        return response.status, json.load(response)
+                except urllib.error.HTTPError as error:
+                    return error.code, json.load(error)
+
+            try:
+                for _, row in self.data_analyzer.seller_effectiveness.iterrows():
+                    status, seller = query(
+                        f"/sellers/{row[self.conf['seller_column_name']]}")
+                    self.assertEqual(status, 200)
+                    self.assertEqual(str(round(seller["effectiveness"])),
+                                     row[self.conf["seller_effectiveness_column"]] or "0")
+                for _, row in self.data_analyzer.seller_offer_coverage.iterrows():
+                    _, seller = query(
+                        f"/sellers/{row[self.conf['seller_column_name']]}")
+                    for customer, counts in seller["customers"].items():
+                        self.assertEqual(
+                            str(round(counts["coverage"])), row[customer])
+
+                for customer in self.data_analyzer.unoffered_products.index:
+                    _, answer = query(f"/customers/{customer}")
+                    self.assertEqual(answer["unoffered_products"],
+                                     self.data_analyzer.get_unoffered_products(customer))
+                self.assertEqual(query("/customers/Unknown")[0], 404)
+
+                rows = query("/status")[1]["rows"]
+                with open(input_file, "a", encoding="utf-8") as f:
+                    f.write("\nNeuer Kunde,Emma,Ananas,verkauft")
+                self.assertTrue(service.reload())
+                self.assertEqual(query("/status")[1]["rows"], rows+1)
+                self.assertEqual(query("/customers/Neuer Kunde")[1]["unoffered_products"],
+                                 [product for product in query("/products")[1] if product != "Ananas"])
+            finally:
+                service.stop()
+
+    def test_query_service_failed_reload(self) -> None:
+        """Tests if the query service finds numeric customers and keeps answering from the previous input while a changed input file cannot be loaded."""
+        data: pd.DataFrame = self.data_loader.read_data(self.conf)
+        data["kunde"] = pd.factorize(data["kunde"])[0] + 1001
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            input_file = os.path.join(temporary_path, "input_sales.csv")
+            data.to_csv(input_file, index=False)
+            service = QueryService(
+                dict(self.conf, input_file=input_file), port=0, reload_interval=0)
+            threading.Thread(target=service.serve_forever, daemon=True).start()
+            host, port = service.get_address()
+
+            def query(path):
+                with urllib.request.urlopen(f"http://{host}:{port}{path}") as response:
+                    return json.load(response)
+
+            try:
+                self.assertIn(1001, query("/customers"))
+                unoffered_products = query("/customers/1001")[
+                    "unoffered_products"]
+                rows = query("/status")["rows"]
+
+                with open(input_file, "w", encoding="utf-8") as f:
+                    f.write("kunde,verkäufer\n")
+                self.assertFalse(service.reload())
+                self.assertEqual(query("/status")["rows"], rows)
+                self.assertEqual(query("/customers/1001")[
+                                 "unoffered_products"], unoffered_products)
+
+                data.iloc[1:].to_csv(input_file, index=False)
+                self.assertTrue(service.reload())
+                self.assertEqual(query("/status")["rows"], rows-1)
+            finally:
+                service.stop()
+
 
 if __name__ == '__main__':
     unittest.main()